@@ -13,6 +13,7 @@ import os
 import re
 import sys
 import logging
+from functools import lru_cache
 from typing import Optional, List, Dict, Any
 from pathlib import Path
 
@@ -420,6 +421,14 @@ class StudentIdentifierRedactor:
 # File Handling Utilities
 # ============================================================================
 
+@lru_cache(maxsize=8)
+def _read_docx_text(file_path: str, mtime_ns: int, size: int) -> str:
+    """Parse DOCX text once per (path, mtime, size); a rewritten file gets a new key."""
+    from docx import Document
+    doc = Document(file_path)
+    return "\n".join([para.text for para in doc.paragraphs])
+
+
 class DocumentProcessor:
     """Handles processing of different document formats"""
     
@@ -427,9 +436,8 @@ class DocumentProcessor:
     def read_docx(file_path: str) -> str:
         """Extract text from DOCX file"""
         try:
-            from docx import Document
-            doc = Document(file_path)
-            return "\n".join([para.text for para in doc.paragraphs])
+            st = os.stat(file_path)
+            return _read_docx_text(file_path, st.st_mtime_ns, st.st_size)
         except ImportError:
             raise RuntimeError("python-docx not installed. Install with: pip install python-docx")
         except Exception as e:
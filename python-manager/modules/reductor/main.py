@@ -1,5 +1,7 @@
 import os
+import re
 import sys
+from functools import lru_cache
 from typing import Optional
 
 from fastapi import FastAPI, HTTPException
@@ -22,6 +24,41 @@ except Exception as e:
 
 app = FastAPI(title="Reductor Service", version="0.1.0")
 
+# Heuristics similar to identity/detector.py
+_NAME_RE = r"\b[A-Z][a-z]+ [A-Z][a-z]+\b"
+_ROLL_RE = r"\b\d{6,15}\b"
+_NAME_PAT = re.compile(_NAME_RE)
+_ROLL_PAT = re.compile(_ROLL_RE)
+# One scan finds both; the two alternatives match disjoint characters
+_NAME_OR_ROLL_PAT = re.compile(rf"(?P<roll>{_ROLL_RE})|(?P<name>{_NAME_RE})")
+
+_DIGITS = "0123456789"
+
+
+def _may_contain_digits(text: str) -> bool:
+    # The default roll pattern needs a digit; non-ASCII text may hold Unicode digits (\d)
+    if not text.isascii():
+        return True
+    return any(d in text for d in _DIGITS)
+
+
+@lru_cache(maxsize=256)
+def _casefree_literal(literal: str) -> "re.Pattern[str]":
+    # Names are removed case-insensitively; compile each distinct name once
+    return re.compile(re.escape(literal), re.IGNORECASE)
+
+
+def _find_name_and_roll(text: str):
+    name_match = roll_match = None
+    for m in _NAME_OR_ROLL_PAT.finditer(text):
+        if m.lastgroup == "roll":
+            roll_match = roll_match or m
+        else:
+            name_match = name_match or m
+        if name_match and roll_match:
+            break
+    return name_match, roll_match
+
 
 class TextRequest(BaseModel):
     text: str
@@ -48,23 +85,27 @@ def health():
 
 @app.post("/anonymize/text", response_model=TextResponse)
 def anonymize_text(req: TextRequest):
-    import re
-
     if not req.text or not req.text.strip():
         raise HTTPException(status_code=400, detail="text is required")
 
-    # Heuristics similar to identity/detector.py
-    name_pat = re.compile(req.name_pattern or r"\b[A-Z][a-z]+ [A-Z][a-z]+\b")
-    roll_pat = re.compile(req.roll_pattern or r"\b\d{6,15}\b")
-
-    name_match = name_pat.search(req.text)
-    roll_match = roll_pat.search(req.text)
+    if req.name_pattern or req.roll_pattern:
+        name_match = re.compile(req.name_pattern or _NAME_RE).search(req.text)
+        roll_match = re.compile(req.roll_pattern or _ROLL_RE).search(req.text)
+    else:
+        # The name pattern needs both cases; ALL-CAPS OCR or lowercase text can't match
+        has_mixed_case = not (req.text.isupper() or req.text.islower())
+        has_digits = _may_contain_digits(req.text)
+        if has_mixed_case and has_digits:
+            name_match, roll_match = _find_name_and_roll(req.text)
+        else:
+            name_match = _NAME_PAT.search(req.text) if has_mixed_case else None
+            roll_match = _ROLL_PAT.search(req.text) if has_digits else None
 
     out = req.text
     if roll_match:
-        out = re.sub(re.escape(roll_match.group(0)), "", out)
+        out = out.replace(roll_match.group(0), "")
     if name_match:
-        out = re.sub(re.escape(name_match.group(0)), "", out, flags=re.IGNORECASE)
+        out = _casefree_literal(name_match.group(0)).sub("", out)
 
     return TextResponse(
         anonymized_text=out,
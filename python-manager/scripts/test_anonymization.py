@@ -8,15 +8,15 @@ import os
 from zipfile import ZipFile
 from lxml import etree
 
+W_T = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}t"
+
 def extract_text_from_docx(docx_path: str) -> str:
     """Extract all visible text from a DOCX file."""
     try:
         with ZipFile(docx_path, 'r') as zip_ref:
-            xml_content = zip_ref.read('word/document.xml')
-            root = etree.fromstring(xml_content)
-            ns = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
-            texts = root.xpath("//w:t", namespaces=ns)
-            return " ".join(t.text for t in texts if t.text)
+            with zip_ref.open('word/document.xml') as xml_file:
+                root = etree.parse(xml_file).getroot()
+            return " ".join(t.text for t in root.iter(W_T) if t.text)
     except Exception as e:
         print(f"Error extracting text: {e}")
         return ""
@@ -40,14 +40,16 @@ if __name__ == "__main__":
     orig_text = extract_text_from_docx(orig_path)
     anon_text = extract_text_from_docx(anon_path)
 
-    print("=" * 80)
-    print("ORIGINAL TEXT (first 500 chars):")
-    print(orig_text[:500])
-    print("\n" + "=" * 80)
-    print("ANONYMIZED TEXT (first 500 chars):")
-    print(anon_text[:500])
-    print("\n" + "=" * 80)
-    print(f"Original length: {len(orig_text)} chars")
-    print(f"Anonymized length: {len(anon_text)} chars")
-    print(f"Difference: {len(orig_text) - len(anon_text)} chars removed")
-    print("=" * 80)
+    print("\n".join([
+        "=" * 80,
+        "ORIGINAL TEXT (first 500 chars):",
+        orig_text[:500],
+        "\n" + "=" * 80,
+        "ANONYMIZED TEXT (first 500 chars):",
+        anon_text[:500],
+        "\n" + "=" * 80,
+        f"Original length: {len(orig_text)} chars",
+        f"Anonymized length: {len(anon_text)} chars",
+        f"Difference: {len(orig_text) - len(anon_text)} chars removed",
+        "=" * 80,
+    ]))
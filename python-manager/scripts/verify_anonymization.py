@@ -8,15 +8,15 @@ from zipfile import ZipFile
 from lxml import etree
 
 WORD_NS = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
+W_T = f"{{{WORD_NS['w']}}}t"
 
 def extract_docx_text(docx_path: str) -> str:
     """Extract all text from DOCX document.xml."""
     try:
         with ZipFile(docx_path, 'r') as zip_ref:
-            xml_content = zip_ref.read('word/document.xml')
-            root = etree.fromstring(xml_content)
-            texts = root.xpath("//w:t", namespaces=WORD_NS)
-            return "\n".join(t.text for t in texts if t.text)
+            with zip_ref.open('word/document.xml') as xml_file:
+                root = etree.parse(xml_file).getroot()
+            return "\n".join(t.text for t in root.iter(W_T) if t.text)
     except Exception as e:
         return f"[Error: {e}]"
 
@@ -33,29 +33,37 @@ if __name__ == "__main__":
 
     anon_text = extract_docx_text(anon_path)
     
-    print("=" * 80)
-    print("📄 ANONYMIZED DOCUMENT TEXT (full)")
-    print("=" * 80)
-    print(anon_text)
-    print("=" * 80)
+    # Collect the report and write it once
+    lines = [
+        "=" * 80,
+        "📄 ANONYMIZED DOCUMENT TEXT (full)",
+        "=" * 80,
+        anon_text,
+        "=" * 80,
+    ]
     
     # Check what was removed
     if len(sys.argv) >= 3:
         orig_path = sys.argv[2]
         if os.path.exists(orig_path):
             orig_text = extract_docx_text(orig_path)
-            print("\n📋 ORIGINAL DOCUMENT TEXT (first 800 chars)")
-            print("=" * 80)
-            print(orig_text[:800])
-            print("=" * 80)
+            lines += [
+                "\n📋 ORIGINAL DOCUMENT TEXT (first 800 chars)",
+                "=" * 80,
+                orig_text[:800],
+                "=" * 80,
+            ]
             
-            # Detect removals
-            removed_lines = []
-            for line in orig_text.split('\n'):
-                if line.strip() and line.strip() not in anon_text:
-                    removed_lines.append(line.strip())
+            # Detect removals (hashed line lookup instead of substring scans)
+            anon_lines = frozenset(s for s in (l.strip() for l in anon_text.splitlines()) if s)
+            removed_lines = [
+                s for s in (l.strip() for l in orig_text.splitlines())
+                if s and s not in anon_lines
+            ]
             
             if removed_lines:
-                print(f"\n✂️ REMOVED CONTENT ({len(removed_lines)} lines):")
+                lines.append(f"\n✂️ REMOVED CONTENT ({len(removed_lines)} lines):")
                 for line in removed_lines[:10]:  # Show first 10
-                    print(f"  - {line[:100]}")
+                    lines.append(f"  - {line[:100]}")
+
+    print("\n".join(lines))
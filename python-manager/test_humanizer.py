@@ -2,43 +2,39 @@
 """
 Test script to verify humanizer preserves formatting and skips tables.
 """
-import subprocess
-import sys
 
 def test_humanizer():
-    print("✅ Testing Humanizer Configuration...")
-    print()
-    
-    print("1. SKIPS TABLES: XPath = //w:p[not(ancestor::w:tbl)]")
-    print("   → Tables will NOT be processed ✓")
-    print()
-    
-    print("2. CONSERVATIVE SETTINGS:")
-    print("   → p_syn=0.2 (only 20% word changes)")
-    print("   → p_trans=0.3 (only 30% transitions)")  
-    print("   → preserve_linebreaks=True ✓")
-    print()
-    
-    print("3. TEXT REDISTRIBUTION:")
-    print("   → All text goes to FIRST node only")
-    print("   → Preserves exact formatting ✓")
-    print("   → No word splitting across nodes")
-    print()
-    
-    print("4. MINIMUM LENGTH:")
-    print("   → Only processes paragraphs > 30 characters")
-    print("   → Skips headings and short lines ✓")
-    print()
-    
-    print("=" * 60)
-    print("SUMMARY: Configuration preserves:")
-    print("  ✓ Table content (completely untouched)")
-    print("  ✓ Alignment (no redistribution issues)")
-    print("  ✓ Spacing (all text in first node)")
-    print("  ✓ Layout (conservative changes only)")
-    print("=" * 60)
-    print()
-    print("Ready to test! Restart Python Manager to apply changes.")
+    lines = [
+        "✅ Testing Humanizer Configuration...",
+        "",
+        "1. SKIPS TABLES: XPath = //w:p[not(ancestor::w:tbl)]",
+        "   → Tables will NOT be processed ✓",
+        "",
+        "2. CONSERVATIVE SETTINGS:",
+        "   → p_syn=0.2 (only 20% word changes)",
+        "   → p_trans=0.3 (only 30% transitions)",
+        "   → preserve_linebreaks=True ✓",
+        "",
+        "3. TEXT REDISTRIBUTION:",
+        "   → All text goes to FIRST node only",
+        "   → Preserves exact formatting ✓",
+        "   → No word splitting across nodes",
+        "",
+        "4. MINIMUM LENGTH:",
+        "   → Only processes paragraphs > 30 characters",
+        "   → Skips headings and short lines ✓",
+        "",
+        "=" * 60,
+        "SUMMARY: Configuration preserves:",
+        "  ✓ Table content (completely untouched)",
+        "  ✓ Alignment (no redistribution issues)",
+        "  ✓ Spacing (all text in first node)",
+        "  ✓ Layout (conservative changes only)",
+        "=" * 60,
+        "",
+        "Ready to test! Restart Python Manager to apply changes.",
+    ]
+    print("\n".join(lines))
     
 if __name__ == "__main__":
     test_humanizer()
@@ -4,6 +4,7 @@ import io
 import zipfile
 from pathlib import Path
 import difflib
+from hashlib import blake2b
 
 from lxml import etree
 
@@ -14,6 +15,13 @@ import docx_humanize_lxml as humanizer
 
 NSMAP = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
 
+# Compiled once; string .xpath() calls re-parse the expression on every call
+_XP_BODY_P = etree.XPath("//w:p[not(ancestor::w:tbl)]", namespaces=NSMAP)
+_XP_T = etree.XPath(".//w:t", namespaces=NSMAP)
+_XP_R = etree.XPath(".//w:r", namespaces=NSMAP)
+_XP_RPR = etree.XPath(".//w:rPr", namespaces=NSMAP)
+_XP_TBL = etree.XPath("//w:tbl", namespaces=NSMAP)
+
 
 def _content_types():
     return (
@@ -78,31 +86,41 @@ def make_docx(path: Path):
 
 
 def read_doc_xml(path: Path):
-    with zipfile.ZipFile(path, "r") as z:
-        data = z.read("word/document.xml")
-    return etree.fromstring(data)
+    with zipfile.ZipFile(path, "r") as z, z.open("word/document.xml") as f:
+        return etree.parse(f).getroot()
 
 
 def paragraph_texts(tree):
-    return ["".join((t.text or "") for t in p.xpath(".//w:t", namespaces=NSMAP))
-            for p in tree.xpath("//w:p[not(ancestor::w:tbl)]", namespaces=NSMAP)]
+    return ["".join((t.text or "") for t in _XP_T(p)) for p in _XP_BODY_P(tree)]
+
+
+def _sig(el):
+    # Compact digest of the serialized element; raw bytes are only rebuilt on mismatch
+    return blake2b(etree.tostring(el), digest_size=16).digest()
+
+
+_NO_RPR = blake2b(b"<no-rPr>", digest_size=16).digest()
 
 
 def list_tables(tree):
-    return [etree.tostring(tbl) for tbl in tree.xpath("//w:tbl", namespaces=NSMAP)]
+    return [_sig(tbl) for tbl in _XP_TBL(tree)]
 
 
 def runs_signature(tree):
     sigs = []
-    for p in tree.xpath("//w:p[not(ancestor::w:tbl)]", namespaces=NSMAP):
+    for p in _XP_BODY_P(tree):
         sig = []
-        for r in p.xpath(".//w:r", namespaces=NSMAP):
-            rpr = r.find(".//w:rPr", namespaces=NSMAP)
-            sig.append(etree.tostring(rpr) if rpr is not None else b"<no-rPr>")
+        for r in _XP_R(p):
+            rpr = _XP_RPR(r)
+            sig.append(_sig(rpr[0]) if rpr else _NO_RPR)
         sigs.append(sig)
     return sigs
 
 
+def _dump(el):
+    return etree.tostring(el).decode("utf-8")
+
+
 def similar(a, b):
     return difflib.SequenceMatcher(a=a, b=b).ratio()
 
@@ -133,11 +151,11 @@ def main():
     # Assertions
     assert len(before_tables) == len(after_tables), "Table count changed"
     for i, (a, b) in enumerate(zip(before_tables, after_tables)):
-        assert a == b, f"Table {i} modified"
+        assert a == b, f"Table {i} modified:\n{_dump(_XP_TBL(before)[i])}\n---\n{_dump(_XP_TBL(after)[i])}"
 
     assert len(before_sigs) == len(after_sigs), "Paragraph count changed"
     for i, (sa, sb) in enumerate(zip(before_sigs, after_sigs)):
-        assert sa == sb, f"Run structure changed at paragraph {i}"
+        assert sa == sb, f"Run structure changed at paragraph {i}:\n{_dump(_XP_BODY_P(before)[i])}\n---\n{_dump(_XP_BODY_P(after)[i])}"
 
     # Paragraph 0: Heading -> unchanged
     assert before_paras[0] == after_paras[0], "Heading was modified"
@@ -2,72 +2,118 @@
 processor.py
 
 New ultra-conservative pipeline:
-- unzip DOCX
-- parse XML ONLY for detection (read-only)
+- read document.xml straight from the DOCX zip
+- stream w:t text ONLY for detection (read-only)
 - remove name/roll with byte-level replacements in document.xml
 - never re-serialize XML (avoids any formatting/alignment change)
-- rezip DOCX
+- copy the DOCX, swapping in only the patched document.xml
 """
 
-import os
-import re
+import shutil
 
-from backend.utils.docx_utils import unzip_docx, load_xml, zip_docx, cleanup_temp_dir
-from backend.identity.detector import detect_identity
+from backend.utils.docx_utils import (
+    read_document_xml,
+    write_docx_with_part,
+    stream_text_nodes,
+    DOCUMENT_XML,
+)
+from backend.identity.detector import detect_identity_stream
 from backend.identity.confidence import assess_confidence
 
 
-def _remove_value_bytes(xml_bytes: bytes, value: str) -> bytes:
+_W_T_OPEN = b"<w:t"
+_W_T_CLOSE = b"</w:t>"
+_GT = ord(">")
+
+
+def _wrapped_spans(low: bytes, val_low: bytes):
+    """
+    Yield (start, end) of every VALUE sitting directly inside <w:t ...>VALUE</w:t>.
+    Both arguments are ASCII-lowercased (the same folding re.IGNORECASE uses on bytes).
     """
-    Remove value from XML bytes while preserving all formatting.
-    Tries to clear the text inside <w:t>...</w:t> without touching tags.
-    Falls back to raw byte replacement if no tag-wrapped match is found.
+    n = len(val_low)
+    pos = low.find(val_low)
+    while pos != -1:
+        end = pos + n
+        if (
+            # startswith/indexing instead of slices: no temporary bytes per candidate
+            low.startswith(_W_T_CLOSE, end)
+            and pos > 0
+            and low[pos - 1] == _GT
+            # an opening <w:t must sit between the previous '>' and this one
+            and low.find(_W_T_OPEN, low.rfind(b">", 0, pos - 1) + 1, pos - 1) != -1
+        ):
+            yield pos, end
+            pos = low.find(val_low, end)
+        else:
+            pos = low.find(val_low, pos + 1)
+
+
+def _remove_values_bytes(xml_bytes: bytes, values) -> bytes:
     """
-    if not value or not value.strip():
+    Remove each value in turn from XML bytes, preserving all formatting.
+    Clears the text inside <w:t>...</w:t> without touching tags.
+    A value with no tag-wrapped match falls back to raw byte replacement.
+    Edits are spliced into one bytearray; the input is returned as-is when nothing matched.
+    """
+    buf = None
+    low = None
+    for value in values:
+        if not value or not value.strip():
+            continue
+        val = value.strip().encode("utf-8")
+        # memmem prefilter: a value without ASCII letters (e.g. a roll number) has no
+        # case variants, so if it isn't present verbatim neither pass can match
+        if val.lower() == val.upper() and val not in (xml_bytes if buf is None else buf):
+            continue
+        if buf is None:
+            buf = bytearray(xml_bytes)
+        if low is None:
+            low = buf.lower()
+
+        spans = list(_wrapped_spans(low, val.lower()))
+        if spans:
+            # Delete back to front so earlier offsets stay valid
+            for start, end in reversed(spans):
+                del buf[start:end]
+        else:
+            # Fallback: raw byte replace (last resort, still preserves formatting)
+            replaced = buf.replace(val, b"")
+            if len(replaced) == len(buf):
+                continue
+            buf = replaced
+        low = None
+
+    if buf is None or len(buf) == len(xml_bytes):
         return xml_bytes
+    return bytes(buf)
 
-    val = value.strip().encode("utf-8")
-
-    # Pattern: <w:t ...>VALUE</w:t>
-    pattern = b"(<w:t[^>]*>)" + re.escape(val) + b"(</w:t>)"
-    replaced = re.sub(pattern, b"\\1\\2", xml_bytes, flags=re.IGNORECASE)
 
-    if replaced != xml_bytes:
-        return replaced
-
-    # Fallback: raw byte replace (last resort, still preserves formatting)
-    return xml_bytes.replace(val, b"")
+def _remove_value_bytes(xml_bytes: bytes, value: str) -> bytes:
+    """Single-value form of _remove_values_bytes."""
+    return _remove_values_bytes(xml_bytes, (value,))
 
 
 def process_docx(input_docx: str, output_docx: str):
-    temp_dir = unzip_docx(input_docx)
-
-    try:
-        document_xml_path = os.path.join(temp_dir, "word/document.xml")
-
-        # Phase 1: detect identity (read-only parse)
-        document_tree = load_xml(document_xml_path)
-        identity = detect_identity(document_tree)
-        confidence = assess_confidence(identity)
-
-        # Phase 2: read XML as bytes (preserve every byte)
-        with open(document_xml_path, "rb") as f:
-            xml_bytes = f.read()
-
-        # Phase 3: remove roll number
-        if confidence.get("remove_roll_no") and identity.get("roll_no"):
-            xml_bytes = _remove_value_bytes(xml_bytes, identity["roll_no"])
-
-        # Phase 4: remove name
-        if confidence.get("remove_name") and identity.get("name"):
-            xml_bytes = _remove_value_bytes(xml_bytes, identity["name"])
-
-        # Phase 5: write bytes back
-        with open(document_xml_path, "wb") as f:
-            f.write(xml_bytes)
-
-        # Phase 6: rezip DOCX
-        zip_docx(temp_dir, output_docx)
-
-    finally:
-        cleanup_temp_dir(temp_dir)
+    # Phase 1: read XML as bytes (preserve every byte); cached per input file
+    xml_bytes = read_document_xml(input_docx)
+
+    # Phase 2: detect identity from streamed text nodes (no DOM is kept)
+    identity = detect_identity_stream(stream_text_nodes(xml_bytes))
+    confidence = assess_confidence(identity)
+
+    # Phase 3: remove roll number, then name
+    values = []
+    if confidence.get("remove_roll_no") and identity.get("roll_no"):
+        values.append(identity["roll_no"])
+    if confidence.get("remove_name") and identity.get("name"):
+        values.append(identity["name"])
+    cleaned = _remove_values_bytes(xml_bytes, values)
+
+    if cleaned is xml_bytes:
+        # Nothing removed: the input is already the output
+        shutil.copyfile(input_docx, output_docx)
+        return
+
+    # Phase 4: copy the DOCX, swapping in the patched document.xml (no extract/rezip)
+    write_docx_with_part(input_docx, output_docx, DOCUMENT_XML, cleaned)
@@ -0,0 +1,41 @@
+"""
+runner.py
+
+Batch runner: anonymizes many DOCX files in parallel.
+Each file is independent and CPU-bound (XML parse + byte scans), so work is
+spread over processes rather than threads.
+
+Workers share nothing mutable: the compiled patterns in detector.py are
+module-level and built once per worker process at import time.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from backend.batch.processor import process_docx
+
+
+def _worker(pair):
+    input_docx, output_docx = pair
+    process_docx(input_docx, output_docx)
+    return output_docx
+
+
+def process_many(pairs, max_workers: int = None) -> list:
+    """
+    Run process_docx over (input_docx, output_docx) pairs.
+    Returns the output paths in input order; the first failure is re-raised.
+    """
+    pairs = list(pairs)
+    if not pairs:
+        return []
+
+    if max_workers is None:
+        max_workers = min(len(pairs), os.cpu_count() or 1)
+
+    # Not worth spinning up processes for a single file
+    if max_workers <= 1:
+        return [_worker(pair) for pair in pairs]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as ex:
+        return list(ex.map(_worker, pairs))
@@ -6,10 +6,9 @@ Handles names in separate nodes and labeled fields.
 Preserves document structure (tables, paragraphs) at all times.
 """
 
-import re
 from lxml import etree
 
-WORD_NAMESPACE = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
+from backend.utils.docx_utils import collect_text_nodes
 
 
 def remove_student_name(document_tree: etree._ElementTree, name: str):
@@ -32,15 +31,23 @@ def remove_student_name(document_tree: etree._ElementTree, name: str):
         return
 
     name_clean = name.strip()
+    target = name_clean.lower()
     
     # Only clear text nodes that EXACTLY match the name (with flexible whitespace)
-    for text_node in document_tree.xpath("//w:t", namespaces=WORD_NAMESPACE):
-        if not text_node.text:
+    text_nodes = collect_text_nodes(document_tree)
+
+    # Runs repeat a lot; normalize each distinct text once
+    texts = [t.text for t in text_nodes]
+    verdicts = {}
+    for i, raw in enumerate(texts):
+        if not raw:
             continue
 
-        node_text = text_node.text.strip()
-        
-        # Only clear if text node is EXACTLY the name (case-insensitive)
-        if node_text.lower() == name_clean.lower():
-            text_node.text = ""
-            print(f"    ✂️ Cleared name cell: '{node_text}'")
+        hit = verdicts.get(raw)
+        if hit is None:
+            # Only clear if text node is EXACTLY the name (case-insensitive)
+            hit = verdicts[raw] = raw.strip().lower() == target
+
+        if hit:
+            text_nodes[i].text = ""
+            print(f"    ✂️ Cleared name cell: '{raw.strip()}'")
@@ -2,13 +2,12 @@
 rollno_remover.py
 
 Removes roll number occurrences from document.xml.
-Uses regex replacement on text nodes only.
+Clears text nodes that exactly match the roll number; no regex involved.
 """
 
-import re
 from lxml import etree
 
-WORD_NAMESPACE = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
+from backend.utils.docx_utils import collect_text_nodes
 
 
 def remove_roll_number(document_tree: etree._ElementTree, roll_no: str):
@@ -23,13 +22,20 @@ def remove_roll_number(document_tree: etree._ElementTree, roll_no: str):
 
     roll_clean = roll_no.strip()
 
-    for node in document_tree.xpath("//w:t", namespaces=WORD_NAMESPACE):
-        if not node.text:
+    text_nodes = collect_text_nodes(document_tree)
+
+    # Memoized per distinct run text
+    texts = [t.text for t in text_nodes]
+    verdicts = {}
+    for i, raw in enumerate(texts):
+        if not raw:
             continue
 
-        node_text = node.text.strip()
-        
-        # Only clear if node is EXACTLY the roll number
-        if node_text == roll_clean:
-            node.text = ""
-            print(f"    ✂️ Cleared roll number cell: '{node_text}'")
+        hit = verdicts.get(raw)
+        if hit is None:
+            # Only clear if node is EXACTLY the roll number
+            hit = verdicts[raw] = raw.strip() == roll_clean
+
+        if hit:
+            text_nodes[i].text = ""
+            print(f"    ✂️ Cleared roll number cell: '{raw.strip()}'")
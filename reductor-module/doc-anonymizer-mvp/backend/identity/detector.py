@@ -8,15 +8,33 @@ This module ONLY detects — it does NOT remove anything.
 import re
 from lxml import etree
 
-WORD_NAMESPACE = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
+from backend.utils.docx_utils import collect_text_nodes, W_T
+
+# Compiled once at import; detect_identity runs for every document
+_LABEL_RE = re.compile(r"^(NAME|STUDENT\s+NAME|SUBMITTED\s+BY|AUTHOR|SIGNED\s+BY)\s*:?\s*(.*)$", re.IGNORECASE)
+_ROLL_RE = re.compile(r"^(ROLL\s*NUMBER|ROLL\s*NO|STUDENT\s*ID|ENROLLMENT\s*NO|STUDENT\s*CODE)\s*:?\s*(.*)$", re.IGNORECASE)
+_LABELED_NAME_RE = re.compile(r'(?:NAME|STUDENT NAME|SUBMITTED BY|AUTHOR|SIGNED BY)\s*[:\-]?\s*([A-Z][A-Za-z]*\s+[A-Z][A-Za-z]*)', re.IGNORECASE)
+_LABELED_ROLL_RE = re.compile(r'(?:ROLL\s*NUMBER|ROLL\s*NO|STUDENT\s*ID|ENROLLMENT\s*NO|STUDENT\s*CODE)\s*[:\-]?\s*(\d{6,15})', re.IGNORECASE)
+# Every label either regex can match starts with one of these words (case-insensitive)
+_LABEL_STARTS = ("NAME", "STUDENT", "SUBMITTED", "AUTHOR", "SIGNED", "ROLL", "ENROLLMENT")
+_LABEL_START_LEN = max(len(w) for w in _LABEL_STARTS)
+_NAME_CAND_RE = re.compile(r'\b([A-Z][A-Za-z]*\s+[A-Z][A-Za-z]*)\b')
+# Fused forms of the full-text searches, so one scan finds whichever comes first
+_LABELED_ANY_RE = re.compile(
+    r'(?:NAME|STUDENT NAME|SUBMITTED BY|AUTHOR|SIGNED BY)\s*[:\-]?\s*(?P<name>[A-Z][A-Za-z]*\s+[A-Z][A-Za-z]*)'
+    r'|(?:ROLL\s*NUMBER|ROLL\s*NO|STUDENT\s*ID|ENROLLMENT\s*NO|STUDENT\s*CODE)\s*[:\-]?\s*(?P<roll>\d{6,15})',
+    re.IGNORECASE,
+)
+# Digits vs letters: the two alternatives can never overlap, so finditer sees the same first hits
+_WEAK_ANY_RE = re.compile(r'\b(?P<roll>\d{6,15})\b|\b(?P<name>[A-Z][A-Za-z]*\s+[A-Z][A-Za-z]*)\b')
 
 
 def extract_all_text(document_tree: etree._ElementTree) -> str:
     """
     Extract all visible text from document.xml.
     """
-    texts = document_tree.xpath("//w:t", namespaces=WORD_NAMESPACE)
-    return " ".join(t.text for t in texts if t.text)
+    texts = [t.text for t in collect_text_nodes(document_tree) if t.text]
+    return " ".join(texts)
 
 
 def detect_identity(document_tree: etree._ElementTree) -> dict:
@@ -24,26 +42,32 @@ def detect_identity(document_tree: etree._ElementTree) -> dict:
     Detect student identity using label-first node walk, then text patterns.
     Handles all-caps labels/values and values in the next text node.
     """
+    # Single walk straight to strings; no intermediate element list
+    texts = (t.text or "" for _, t in etree.iterwalk(document_tree, events=("end",), tag=W_T))
+    return detect_identity_stream(texts)
 
-    def text_nodes(tree):
-        return [t.text or "" for t in tree.xpath("//w:t", namespaces=WORD_NAMESPACE)]
 
-    full_text = extract_all_text(document_tree)
-    nodes = text_nodes(document_tree)
+def detect_identity_stream(texts) -> dict:
+    """
+    detect_identity over plain <w:t> strings (e.g. from stream_text_nodes),
+    so detection does not need a parsed tree.
+    """
+    nodes = list(texts)
+    full_text = " ".join([t for t in nodes if t])
     detected_name = None
     detected_roll = None
     confidence = "LOW"
 
-    label_re = re.compile(r"^(NAME|STUDENT\s+NAME|SUBMITTED\s+BY|AUTHOR|SIGNED\s+BY)\s*:?\s*(.*)$", re.IGNORECASE)
-    roll_re = re.compile(r"^(ROLL\s*NUMBER|ROLL\s*NO|STUDENT\s*ID|ENROLLMENT\s*NO|STUDENT\s*CODE)\s*:?\s*(.*)$", re.IGNORECASE)
-
     # Phase 1: walk text nodes for labels; value can be on same or next node
     for idx, txt in enumerate(nodes):
         txt_stripped = txt.strip()
         if not txt_stripped:
             continue
+        # Literal prefix check first; most runs are body text and never reach the regexes
+        if not txt_stripped[:_LABEL_START_LEN].upper().startswith(_LABEL_STARTS):
+            continue
 
-        m = label_re.match(txt_stripped)
+        m = _LABEL_RE.match(txt_stripped)
         if m and not detected_name:
             remainder = m.group(2).strip()
             if remainder:
@@ -56,7 +80,7 @@ def detect_identity(document_tree: etree._ElementTree) -> dict:
             if detected_name:
                 confidence = "HIGH"
 
-        r = roll_re.match(txt_stripped)
+        r = _ROLL_RE.match(txt_stripped)
         if r and not detected_roll:
             remainder = r.group(2).strip()
             if remainder:
@@ -70,17 +94,32 @@ def detect_identity(document_tree: etree._ElementTree) -> dict:
                 confidence = "HIGH"
 
     # Phase 2: pattern on full text if still missing
-    if not detected_name:
-        nm = re.search(r'(?:NAME|STUDENT NAME|SUBMITTED BY|AUTHOR|SIGNED BY)\s*[:\-]?\s*([A-Z][A-Za-z]*\s+[A-Z][A-Za-z]*)', full_text, re.IGNORECASE)
+    if not detected_name and not detected_roll:
+        # One scan up to the first labeled hit of either kind; neither pattern can
+        # match earlier, so the other is only searched for from that point on
+        m = _LABELED_ANY_RE.search(full_text)
+        if m:
+            confidence = "HIGH"
+            if m.group("name") is not None:
+                detected_name = m.group("name").strip()
+                rm = _LABELED_ROLL_RE.search(full_text, m.start())
+                if rm:
+                    detected_roll = rm.group(1).strip()
+            else:
+                detected_roll = m.group("roll").strip()
+                nm = _LABELED_NAME_RE.search(full_text, m.start())
+                if nm:
+                    detected_name = nm.group(1).strip()
+    elif not detected_name:
+        nm = _LABELED_NAME_RE.search(full_text)
         if nm:
             detected_name = nm.group(1).strip()
             confidence = "HIGH"
-
-    if not detected_roll:
-        rm = re.search(r'(?:ROLL\s*NUMBER|ROLL\s*NO|STUDENT\s*ID|ENROLLMENT\s*NO|STUDENT\s*CODE)\s*[:\-]?\s*(\d{6,15})', full_text, re.IGNORECASE)
+    elif not detected_roll:
+        rm = _LABELED_ROLL_RE.search(full_text)
         if rm:
             detected_roll = rm.group(1).strip()
-            confidence = "HIGH" if detected_name else "HIGH"
+            confidence = "HIGH"
 
     # Phase 3: proximity to roll (medium)
     if detected_roll and not detected_name:
@@ -89,21 +128,23 @@ def detect_identity(document_tree: etree._ElementTree) -> dict:
             context_before = full_text[max(0, roll_idx - 200):roll_idx]
             context_after = full_text[roll_idx:min(len(full_text), roll_idx + 200)]
             full_context = context_before + context_after
-            name_candidates = re.findall(r'\b([A-Z][A-Za-z]*\s+[A-Z][A-Za-z]*)\b', full_context)
+            name_candidates = _NAME_CAND_RE.findall(full_context)
             if name_candidates:
-                names_before = re.findall(r'\b([A-Z][A-Za-z]*\s+[A-Z][A-Za-z]*)\b', context_before)
+                names_before = _NAME_CAND_RE.findall(context_before)
                 detected_name = names_before[-1] if names_before else name_candidates[0]
                 confidence = "MEDIUM"
 
     # Phase 4: weak fallback (low)
     if not detected_name and not detected_roll:
-        roll_match_weak = re.search(r'\b(\d{6,15})\b', full_text)
-        if roll_match_weak:
-            detected_roll = roll_match_weak.group(1)
-            confidence = "LOW"
-        name_match_weak = re.search(r'\b([A-Z][A-Za-z]*\s+[A-Z][A-Za-z]*)\b', full_text)
-        if name_match_weak:
-            detected_name = name_match_weak.group(1)
+        for m in _WEAK_ANY_RE.finditer(full_text):
+            if m.group("roll") is not None:
+                if not detected_roll:
+                    detected_roll = m.group("roll")
+            elif not detected_name:
+                detected_name = m.group("name")
+            if detected_name and detected_roll:
+                break
+        if detected_name or detected_roll:
             confidence = "LOW"
 
     return {
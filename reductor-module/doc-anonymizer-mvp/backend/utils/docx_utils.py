@@ -3,59 +3,92 @@ docx_utils.py
 
 Low-level DOCX utilities.
 This file is responsible for:
-- Unzipping a DOCX file
-- Loading XML files using lxml
-- Writing XML back
-- Rezipping the DOCX without breaking structure
+- Reading word/document.xml straight from the DOCX zip
+- Walking document.xml text nodes with lxml (read-only; trees are never written back)
+- Rewriting a single part of the DOCX without breaking structure
 
 IMPORTANT:
 - NEVER recreate XML from scratch
-- ALWAYS modify existing XML trees
+- ALWAYS edit the existing document.xml bytes in place
 - This guarantees pixel-perfect layout preservation
 """
 
-from zipfile import ZipFile
+from functools import lru_cache
+from io import BytesIO
+from zipfile import ZipFile, ZipInfo
 from lxml import etree
-import tempfile
 import os
 import shutil
 
+__all__ = [
+    "DOCUMENT_XML",
+    "W_T",
+    "read_document_xml",
+    "collect_text_nodes",
+    "stream_text_nodes",
+    "write_docx_with_part",
+]
 
-def unzip_docx(docx_path: str) -> str:
-    temp_dir = tempfile.mkdtemp()
+DOCUMENT_XML = "word/document.xml"
+W_T = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}t"
+
+
+@lru_cache(maxsize=16)
+def _cached_document_xml(docx_path: str, mtime_ns: int, size: int) -> bytes:
     with ZipFile(docx_path, 'r') as zip_ref:
-        zip_ref.extractall(temp_dir)
-    return temp_dir
+        return zip_ref.read(DOCUMENT_XML)
+
+
+def read_document_xml(docx_path: str) -> bytes:
+    """
+    Raw word/document.xml bytes of a DOCX.
+    Cached per (path, mtime, size) so re-running the same input skips the unzip.
+    """
+    st = os.stat(docx_path)
+    return _cached_document_xml(os.path.abspath(docx_path), st.st_mtime_ns, st.st_size)
+
 
+def collect_text_nodes(tree) -> list:
+    """Every <w:t> element in document order, as a list, from a single tree walk."""
+    return [el for _, el in etree.iterwalk(tree, events=("end",), tag=W_T)]
 
-def load_xml(xml_path: str) -> etree._ElementTree:
-    parser = etree.XMLParser(
-        remove_blank_text=False,
-        strip_cdata=False,
-        remove_comments=False,
-        remove_pis=False,
-    )
-    return etree.parse(xml_path, parser)
 
+def stream_text_nodes(xml_bytes: bytes):
+    """
+    Yield the text of every <w:t> ("" when empty) without keeping a DOM around.
+    Elements are cleared as soon as they close and already-processed siblings are
+    detached, so memory stays flat on large documents.
+    """
+    for _, elem in etree.iterparse(BytesIO(xml_bytes), events=("end",)):
+        if elem.tag == W_T:
+            yield elem.text or ""
+        elem.clear(keep_tail=True)
+        # The root has no parent; its getprevious() is a top-level comment or PI
+        parent = elem.getparent()
+        if parent is not None:
+            while elem.getprevious() is not None:
+                del parent[0]
 
-def save_xml(tree: etree._ElementTree, xml_path: str):
-    tree.write(
-        xml_path,
-        encoding="UTF-8",
-        xml_declaration=True,
-        pretty_print=False,
-        standalone=True
-    )
 
+_COPY_CHUNK = 1024 * 1024
 
-def zip_docx(extracted_dir: str, output_docx: str):
-    with ZipFile(output_docx, 'w') as zipf:
-        for foldername, _, filenames in os.walk(extracted_dir):
-            for filename in filenames:
-                file_path = os.path.join(foldername, filename)
-                arcname = os.path.relpath(file_path, extracted_dir)
-                zipf.write(file_path, arcname)
 
+def write_docx_with_part(source_docx: str, output_docx: str, part_name: str, data: bytes):
+    """
+    Copy source_docx to output_docx, replacing a single part's bytes.
+    No temp dir: every member is streamed across with its original name,
+    timestamp, attributes and compression method.
+    """
+    with ZipFile(source_docx, 'r') as zin, ZipFile(output_docx, 'w') as zout:
+        for info in zin.infolist():
+            out_info = ZipInfo(info.filename, info.date_time)
+            out_info.compress_type = info.compress_type
+            out_info.external_attr = info.external_attr
+            if info.filename == part_name:
+                zout.writestr(out_info, data)
+                continue
+            # Stream untouched parts (images, fonts) in chunks instead of holding each in memory
+            out_info.file_size = info.file_size
+            with zin.open(info) as src, zout.open(out_info, 'w') as dst:
+                shutil.copyfileobj(src, dst, _COPY_CHUNK)
 
-def cleanup_temp_dir(temp_dir: str):
-    shutil.rmtree(temp_dir)
@@ -0,0 +1,46 @@
+"""
+test_docx_utils.py
+
+Checks for the streaming document.xml reader in backend/utils/docx_utils.py.
+Run from anywhere: python tests/test_docx_utils.py
+"""
+
+import sys
+from pathlib import Path
+
+# Make the backend package importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.utils.docx_utils import stream_text_nodes
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def _document(body: str, prolog: str = "") -> bytes:
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'{prolog}<w:document xmlns:w="{W_NS}"><w:body>{body}</w:body></w:document>'
+    ).encode("utf-8")
+
+
+BODY = (
+    "<w:p><w:r><w:t>NAME:</w:t></w:r><w:r><w:t xml:space=\"preserve\"> </w:t></w:r></w:p>"
+    "<w:p><w:r><w:t>JOHN DOE</w:t></w:r><w:r><w:t/></w:r></w:p>"
+)
+
+
+def test_stream_text_nodes():
+    """Every <w:t> in document order, "" for empty nodes"""
+    assert list(stream_text_nodes(_document(BODY))) == ["NAME:", " ", "JOHN DOE", ""]
+
+
+def test_stream_text_nodes_top_level_comment_and_pi():
+    """A comment or PI before the root must not break the sibling cleanup"""
+    xml = _document(BODY, prolog="<!-- generated --><?mso-application progid=\"Word.Document\"?>")
+    assert list(stream_text_nodes(xml)) == ["NAME:", " ", "JOHN DOE", ""]
+
+
+if __name__ == "__main__":
+    test_stream_text_nodes()
+    test_stream_text_nodes_top_level_comment_and_pi()
+    print("✓ docx_utils checks passed")
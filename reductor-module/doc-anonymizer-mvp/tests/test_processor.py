@@ -0,0 +1,120 @@
+"""
+test_processor.py
+
+Checks for the byte-level value removal in backend/batch/processor.py.
+Every case is also compared against the original regex implementation.
+Run from anywhere: python tests/test_processor.py
+"""
+
+import re
+import sys
+from pathlib import Path
+
+# Make the backend package importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.batch.processor import _remove_value_bytes, _remove_values_bytes
+
+
+def _reference_remove(xml_bytes: bytes, value: str) -> bytes:
+    """The original regex-based _remove_value_bytes."""
+    if not value or not value.strip():
+        return xml_bytes
+
+    val = value.strip().encode("utf-8")
+    pattern = b"(<w:t[^>]*>)" + re.escape(val) + b"(</w:t>)"
+    replaced = re.sub(pattern, b"\\1\\2", xml_bytes, flags=re.IGNORECASE)
+
+    if replaced != xml_bytes:
+        return replaced
+    return xml_bytes.replace(val, b"")
+
+
+def _check(xml: bytes, value: str, expected: bytes):
+    result = _remove_value_bytes(xml, value)
+    assert result == expected, result
+    assert result == _reference_remove(xml, value), result
+
+
+def test_wrapped_value():
+    _check(
+        b'<w:r><w:t xml:space="preserve">JOHN DOE</w:t></w:r>',
+        "JOHN DOE",
+        b'<w:r><w:t xml:space="preserve"></w:t></w:r>',
+    )
+
+
+def test_value_right_after_close_tag():
+    """Only the wrapped hit is cleared; a value after </w:t> is not inside a <w:t>"""
+    _check(
+        b"<w:t>JOHN</w:t></w:r><w:t>x</w:t>JOHN</w:t>",
+        "JOHN",
+        b"<w:t></w:t></w:r><w:t>x</w:t>JOHN</w:t>",
+    )
+
+
+def test_value_ending_a_longer_node():
+    """The value must start right after the tag's '>', not just end at </w:t>"""
+    _check(
+        b"<w:t>Mr JOHN</w:t><w:t>JOHN</w:t>",
+        "JOHN",
+        b"<w:t>Mr JOHN</w:t><w:t></w:t>",
+    )
+    # An unclosed <w:t before the value is not a wrapped hit either
+    _check(b"<w:t JOHN</w:t><w:t>x JOHN</w:t>", "JOHN", b"<w:t </w:t><w:t>x </w:t>")
+
+
+def test_open_tag_before_an_earlier_gt():
+    """<w:t must sit after the last '>' before the value, not anywhere earlier"""
+    _check(
+        b"<w:t>a</w:t><w:p>JOHN</w:t><w:t>JOHN</w:t>",
+        "JOHN",
+        b"<w:t>a</w:t><w:p>JOHN</w:t><w:t></w:t>",
+    )
+
+
+def test_repeated_values():
+    """Every wrapped node is cleared; a node holding the value twice is not 'wrapped'"""
+    _check(
+        b"<w:t>JOHN</w:t><w:t>JOHN</w:t><w:t>JOHN</w:t>",
+        "JOHN",
+        b"<w:t></w:t><w:t></w:t><w:t></w:t>",
+    )
+    _check(b"<w:t>JOHNJOHN</w:t>", "JOHN", b"<w:t></w:t>")
+    _check(b"<w:t>AAA</w:t>", "AA", b"<w:t>A</w:t>")
+
+
+def test_case_insensitive():
+    _check(b"<w:t>john doe</w:t><w:t>John Doe</w:t>", "JOHN DOE", b"<w:t></w:t><w:t></w:t>")
+    # The raw fallback stays case-sensitive, as before
+    _check(b"<w:t>By john doe</w:t>", "JOHN DOE", b"<w:t>By john doe</w:t>")
+
+
+def test_unwrapped_fallback():
+    _check(b"<w:t>Name: JOHN DOE</w:t>", "JOHN DOE", b"<w:t>Name: </w:t>")
+    _check(b"<w:t>Roll 12345678, 12345678</w:t>", "12345678", b"<w:t>Roll , </w:t>")
+
+
+def test_values_in_order():
+    """Roll then name, each on the previous result, exactly like two sequential calls"""
+    xml = b"<w:t>12345678</w:t><w:t>Roll 12345678 JOHN DOE</w:t><w:t>john doe</w:t>"
+    expected = _reference_remove(_reference_remove(xml, "12345678"), "JOHN DOE")
+    assert _remove_values_bytes(xml, ["12345678", "JOHN DOE"]) == expected
+
+
+def test_no_match_returns_input():
+    xml = b"<w:t>nothing here</w:t>"
+    assert _remove_values_bytes(xml, ["12345678", "JOHN DOE", "", None]) is xml
+
+
+if __name__ == "__main__":
+    test_wrapped_value()
+    test_value_right_after_close_tag()
+    test_value_ending_a_longer_node()
+    test_open_tag_before_an_earlier_gt()
+    test_repeated_values()
+    test_case_insensitive()
+    test_unwrapped_fallback()
+    test_values_in_order()
+    test_no_match_returns_input()
+    print("✓ processor checks passed")
@@ -16,15 +16,29 @@ class Config:
     APP_VERSION = "2.0.0"
     DEBUG = os.getenv("DEBUG", "false").lower() == "true"
     PORT = int(os.getenv("REDUCTOR_PORT", 5018))
+    UVICORN_WORKERS = int(os.getenv("UVICORN_WORKERS", 1))
 
     # MinIO
     MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT", "localhost:9000")
     MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY", "minioadmin")
     MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY", "minioadmin")
     MINIO_USE_SSL = os.getenv("MINIO_USE_SSL", "false").lower() == "true"
+    # Uploads at or above the threshold use parallel multipart (part size must be >= 5 MiB)
+    MINIO_MULTIPART_THRESHOLD = int(os.getenv("MINIO_MULTIPART_THRESHOLD", 32 * 1024 * 1024))
+    MINIO_PART_SIZE = int(os.getenv("MINIO_PART_SIZE", 16 * 1024 * 1024))
+    MINIO_PARALLEL_UPLOADS = int(os.getenv("MINIO_PARALLEL_UPLOADS", 8))
+    # Connections kept open per host in the shared pool
+    MINIO_POOL_MAXSIZE = int(os.getenv("MINIO_POOL_MAXSIZE", 64))
+    # Lowest TLS version accepted when MINIO_USE_SSL is on (TLSv1_2 or TLSv1_3)
+    MINIO_TLS_MIN_VERSION = os.getenv("MINIO_TLS_MIN_VERSION", "TLSv1_2")
 
     # Conversion
     TEMP_DIR = os.getenv("TEMP_DIR", "./tmp")
+    # DOCX files up to this size are anonymized and uploaded without touching TEMP_DIR
+    MAX_IN_MEMORY_BYTES = int(os.getenv("MAX_IN_MEMORY_BYTES", 20 * 1024 * 1024))
+
+    # In-memory result cache: skip reprocessing an unchanged PDF (same ETag); 0 disables
+    RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", 256))
 
 
 config = Config()
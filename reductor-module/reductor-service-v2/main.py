@@ -5,16 +5,19 @@ Reductor Service v2: FastAPI entry point
 """
 
 import os
+import asyncio
+import tempfile
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from typing import Optional
 
 from config import config
 from logger import get_logger
-from utils.minio_utils import minio_client
+from utils.minio_utils import get_client, async_client
 from utils.converter_utils import pdf_to_docx
 from utils.identity_detector import detect_identity
-from utils.docx_anonymizer import anonymize_docx, load_xml
+from utils.docx_anonymizer import anonymize_docx, anonymize_document, read_document_xml
+from utils.result_cache import ResultCache
 
 logger = get_logger(__name__)
 
@@ -34,13 +37,31 @@ class AnonymizeRequest(BaseModel):
 
 class AnonymizeResponse(BaseModel):
     status: str
-    anonymized_docx_path: Optional[str] = None
     minio_output_key: Optional[str] = None
     detected_before: Optional[dict] = None
     detected_after: Optional[dict] = None
     removed_bytes: int = 0
 
 
+result_cache = ResultCache(config.RESULT_CACHE_SIZE)
+
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+# Blocking helpers (run via asyncio.to_thread)
+def _detect_file(docx_path: str) -> dict:
+    return detect_identity(read_document_xml(docx_path))
+
+
+def _upload_file(bucket: str, object_key: str, path: str):
+    # Stream straight from the file; no in-memory copy of the DOCX
+    get_client().upload_file(bucket, object_key, path, DOCX_CONTENT_TYPE)
+
+
+def _upload_bytes(bucket: str, object_key: str, data: bytes):
+    get_client().upload(bucket, object_key, data, DOCX_CONTENT_TYPE, skip_unchanged=True)
+
+
 # Routes
 @app.get("/health")
 def health():
@@ -52,7 +73,7 @@ def health():
 
 
 @app.post("/anonymize", response_model=AnonymizeResponse)
-def anonymize(req: AnonymizeRequest):
+async def anonymize(req: AnonymizeRequest):
     """
     End-to-end anonymization pipeline:
     1. Download PDF from MinIO raw/
@@ -61,6 +82,9 @@ def anonymize(req: AnonymizeRequest):
     4. Remove name + roll
     5. Upload anonymized DOCX to formatted/
     6. Return before/after report
+
+    Blocking steps (MinIO, conversion, zip/lxml work) run in worker threads
+    so the event loop keeps serving other requests.
     """
     try:
         logger.info(f"\n{'='*60}")
@@ -69,77 +93,108 @@ def anonymize(req: AnonymizeRequest):
         logger.info(f"   Object: {req.object_key}")
         logger.info(f"{'='*60}")
 
-        # Temp directory for local artifacts
-        temp_dir = config.TEMP_DIR
-        os.makedirs(temp_dir, exist_ok=True)
-        
         filename_base = os.path.splitext(os.path.basename(req.object_key))[0]
-        converted_path = os.path.join(temp_dir, f"{filename_base}_converted.docx")
-        anonymized_path = os.path.join(temp_dir, f"{filename_base}_anonymized.docx")
+        output_key = req.output_key or req.object_key.replace("/raw/", "/formatted/").replace(".pdf", "_anonymized.docx")
+
+        # Same PDF version already anonymized to the same key? Reuse that result.
+        etag = await async_client.etag(req.bucket, req.object_key)
+        cached = result_cache.get(req.bucket, req.object_key, etag)
+        if (
+            cached is not None
+            and cached["minio_output_key"] == output_key
+            and await async_client.exists(req.bucket, output_key)
+        ):
+            logger.info(f"♻️  Cache hit for {req.object_key} ({etag}); skipping pipeline")
+            return AnonymizeResponse(status="success", **cached)
 
         # Step 1: Download PDF from MinIO
         logger.info("\n[1/6] Downloading PDF from MinIO...")
-        pdf_data = minio_client.download(req.bucket, req.object_key)
+        pdf_data = await async_client.download(req.bucket, req.object_key)
 
-        # Step 2: Convert PDF → DOCX
+        # Step 2: Convert PDF → DOCX (kept in memory)
         logger.info("\n[2/6] Converting PDF to DOCX...")
-        docx_data = pdf_to_docx(pdf_data)
-        with open(converted_path, "wb") as f:
-            f.write(docx_data.getvalue())
-        logger.info(f"✅ Saved to {converted_path}")
-
-        # Step 3: Detect identity BEFORE
-        logger.info("\n[3/6] Detecting student identity (BEFORE anonymization)...")
-        from utils.docx_anonymizer import unzip_docx
-        import shutil
-        temp_unzip = unzip_docx(converted_path)
-        tree_before = load_xml(os.path.join(temp_unzip, "word/document.xml"))
-        identity_before = detect_identity(tree_before)
-        logger.info(f"✅ Detected: {identity_before}")
-        shutil.rmtree(temp_unzip)
-
-        # Step 4: Anonymize
-        logger.info("\n[4/6] Anonymizing (removing name and roll)...")
-        anon_stats = anonymize_docx(
-            converted_path,
-            anonymized_path,
-            name=identity_before.get("name"),
-            roll_no=identity_before.get("roll_no"),
-        )
-
-        # Step 5: Detect identity AFTER
-        logger.info("\n[5/6] Detecting student identity (AFTER anonymization)...")
-        temp_unzip = unzip_docx(anonymized_path)
-        tree_after = load_xml(os.path.join(temp_unzip, "word/document.xml"))
-        identity_after = detect_identity(tree_after)
-        logger.info(f"✅ After anonymization: {identity_after}")
-        shutil.rmtree(temp_unzip)
-
-        # Step 6: Upload to MinIO
-        logger.info("\n[6/6] Uploading anonymized DOCX to MinIO...")
-        output_key = req.output_key or req.object_key.replace("/raw/", "/formatted/").replace(".pdf", "_anonymized.docx")
-        with open(anonymized_path, "rb") as f:
-            import io
-            buf = io.BytesIO(f.read())
-        minio_client.upload(
-            req.bucket,
-            output_key,
-            buf,
-            "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        )
+        docx_data = await asyncio.to_thread(pdf_to_docx, pdf_data)
+
+        if docx_data.getbuffer().nbytes <= config.MAX_IN_MEMORY_BYTES:
+            # Typical case: no temp files at all. document.xml is inflated once and
+            # shared by detect-before, the anonymizer and detect-after.
+            # Both readers below take the BytesIO as-is; getvalue() would copy the DOCX
+            del pdf_data
+
+            # Step 3: Detect identity BEFORE
+            logger.info("\n[3/6] Detecting student identity (BEFORE anonymization)...")
+            document_xml = await asyncio.to_thread(read_document_xml, docx_data)
+            identity_before = await asyncio.to_thread(detect_identity, document_xml)
+            logger.info(f"✅ Detected: {identity_before}")
+
+            # Step 4: Anonymize
+            logger.info("\n[4/6] Anonymizing (removing name and roll)...")
+            anonymized_bytes, anonymized_xml, anon_stats = await asyncio.to_thread(
+                anonymize_document,
+                docx_data,
+                name=identity_before.get("name"),
+                roll_no=identity_before.get("roll_no"),
+                document_xml=document_xml,
+            )
+
+            # Steps 5 + 6: Detect identity AFTER while uploading (neither touches the other's data)
+            logger.info("\n[5/6] Detecting student identity (AFTER anonymization)...")
+            logger.info("\n[6/6] Uploading anonymized DOCX to MinIO...")
+            identity_after, _ = await asyncio.gather(
+                asyncio.to_thread(detect_identity, anonymized_xml),
+                asyncio.to_thread(_upload_bytes, req.bucket, output_key, anonymized_bytes),
+            )
+            logger.info(f"✅ After anonymization: {identity_after}")
+        else:
+            # Large DOCX: spill to one per-request temp dir so the rezip streams from disk;
+            # the dir and everything in it is removed when the request finishes
+            os.makedirs(config.TEMP_DIR, exist_ok=True)
+            with tempfile.TemporaryDirectory(dir=config.TEMP_DIR) as td:
+                converted_path = os.path.join(td, f"{filename_base}_converted.docx")
+                anonymized_path = os.path.join(td, f"{filename_base}_anonymized.docx")
+
+                with open(converted_path, "wb") as f:
+                    f.write(docx_data.getbuffer())
+                del docx_data, pdf_data
+                logger.info(f"✅ Saved to {converted_path}")
+
+                # Step 3: Detect identity BEFORE
+                logger.info("\n[3/6] Detecting student identity (BEFORE anonymization)...")
+                identity_before = await asyncio.to_thread(_detect_file, converted_path)
+                logger.info(f"✅ Detected: {identity_before}")
+
+                # Step 4: Anonymize
+                logger.info("\n[4/6] Anonymizing (removing name and roll)...")
+                anon_stats = await asyncio.to_thread(
+                    anonymize_docx,
+                    converted_path,
+                    anonymized_path,
+                    name=identity_before.get("name"),
+                    roll_no=identity_before.get("roll_no"),
+                )
+
+                # Steps 5 + 6: Detect identity AFTER while uploading (neither touches the other's data)
+                logger.info("\n[5/6] Detecting student identity (AFTER anonymization)...")
+                logger.info("\n[6/6] Uploading anonymized DOCX to MinIO...")
+                identity_after, _ = await asyncio.gather(
+                    asyncio.to_thread(_detect_file, anonymized_path),
+                    asyncio.to_thread(_upload_file, req.bucket, output_key, anonymized_path),
+                )
+                logger.info(f"✅ After anonymization: {identity_after}")
 
         logger.info(f"\n{'='*60}")
         logger.info(f"✅ Anonymization pipeline COMPLETE")
         logger.info(f"{'='*60}\n")
 
-        return AnonymizeResponse(
-            status="success",
-            anonymized_docx_path=anonymized_path,
-            minio_output_key=output_key,
-            detected_before=identity_before,
-            detected_after=identity_after,
-            removed_bytes=anon_stats.get("bytes_removed", 0),
-        )
+        result = {
+            "minio_output_key": output_key,
+            "detected_before": identity_before,
+            "detected_after": identity_after,
+            "removed_bytes": anon_stats.get("bytes_removed", 0),
+        }
+        result_cache.put(req.bucket, req.object_key, etag, result)
+
+        return AnonymizeResponse(status="success", **result)
 
     except Exception as e:
         logger.error(f"\n❌ Anonymization FAILED: {e}", exc_info=True)
@@ -148,9 +203,11 @@ def anonymize(req: AnonymizeRequest):
 
 if __name__ == "__main__":
     import uvicorn
+    # Multiple workers need the app as an import string
     uvicorn.run(
-        app,
+        "main:app" if config.UVICORN_WORKERS > 1 else app,
         host="0.0.0.0",
         port=config.PORT,
         log_level="info",
+        workers=config.UVICORN_WORKERS,
     )
@@ -11,6 +11,19 @@ from logger import get_logger
 
 logger = get_logger(__name__)
 
+# Resolve and import the converter once per process, not per request
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+_CONVERTER_PATH = os.path.join(_ROOT, "python-manager", "modules", "converter-module")
+if _CONVERTER_PATH not in sys.path:
+    sys.path.insert(0, _CONVERTER_PATH)
+
+try:
+    from services.pdf_converter import PDFConverter
+    _IMPORT_ERROR = None
+except Exception as e:  # surfaced on first use so the service still starts
+    PDFConverter = None
+    _IMPORT_ERROR = e
+
 
 def pdf_to_docx(pdf_data: io.BytesIO) -> io.BytesIO:
     """
@@ -27,18 +40,15 @@ def pdf_to_docx(pdf_data: io.BytesIO) -> io.BytesIO:
     logger.info("📄 Converting PDF → DOCX (using converter-module)...")
     
     try:
-        # Import converter from converter-module
-        ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
-        converter_path = os.path.join(ROOT, "python-manager", "modules", "converter-module")
-        if converter_path not in sys.path:
-            sys.path.insert(0, converter_path)
-        
-        from services.pdf_converter import PDFConverter
-        
+        if PDFConverter is None:
+            raise _IMPORT_ERROR
+
         # Use the working converter
         docx_data = PDFConverter.convert_pdf_to_docx(pdf_data)
         
-        logger.info(f"✅ PDF → DOCX complete ({len(docx_data.getvalue())} bytes)")
+        # getbuffer() is a view; getvalue() would copy the whole DOCX just to log its size
+        logger.info(f"✅ PDF → DOCX complete ({docx_data.getbuffer().nbytes} bytes)")
+
         return docx_data
         
     except Exception as e:
@@ -11,189 +11,257 @@ CRITICAL PRINCIPLE:
 - Preserves all structure, spacing, alignment
 """
 
+import io
 import os
 import re
+import shutil
 import zipfile
-import tempfile
+from functools import lru_cache
 from lxml import etree
 from logger import get_logger
 
 logger = get_logger(__name__)
 
 WORD_NAMESPACE = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
+DOCUMENT_XML = "word/document.xml"
+_COPY_CHUNK = 1024 * 1024
 
 
-def unzip_docx(docx_path: str) -> str:
-    """Unzip DOCX to temp directory."""
-    temp_dir = tempfile.mkdtemp()
-    with zipfile.ZipFile(docx_path, 'r') as z:
-        z.extractall(temp_dir)
-    return temp_dir
+def read_document_xml(docx) -> bytes:
+    """Read word/document.xml straight from the DOCX zip (path, raw DOCX bytes or a file object; nothing is extracted)."""
+    if isinstance(docx, (bytes, bytearray)):
+        docx = io.BytesIO(docx)
+    with zipfile.ZipFile(docx, 'r') as z:
+        return z.read(DOCUMENT_XML)
 
 
-def load_xml(xml_path: str) -> etree._ElementTree:
-    """Load XML with parser that preserves all whitespace."""
+def _parse_xml_bytes(xml_bytes: bytes) -> etree._ElementTree:
+    """Parse document.xml bytes with a parser that preserves all whitespace."""
     parser = etree.XMLParser(
         remove_blank_text=False,
         strip_cdata=False,
         remove_comments=False,
     )
-    return etree.parse(xml_path, parser)
+    return etree.ElementTree(etree.fromstring(xml_bytes, parser))
 
 
-def zip_docx(temp_dir: str, output_path: str):
-    """Rezip DOCX from temp directory."""
-    with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as z:
-        for foldername, _, filenames in os.walk(temp_dir):
-            for filename in filenames:
-                file_path = os.path.join(foldername, filename)
-                arcname = os.path.relpath(file_path, temp_dir)
-                z.write(file_path, arcname)
+def _serialize(tree: etree._ElementTree) -> bytes:
+    """Same bytes tree.write(path, encoding="UTF-8", xml_declaration=True) produces."""
+    return etree.tostring(tree, encoding="UTF-8", xml_declaration=True)
 
 
-def _remove_value_from_text_nodes(docx_path: str, value: str) -> int:
+def _copy_with_document_xml(zin: zipfile.ZipFile, zout: zipfile.ZipFile, new_bytes: bytes):
+    """Copy every member of zin into zout, swapping in new_bytes for word/document.xml."""
+    for info in zin.infolist():
+        out_info = zipfile.ZipInfo(info.filename, info.date_time)
+        out_info.compress_type = info.compress_type
+        out_info.external_attr = info.external_attr
+        if info.filename == DOCUMENT_XML:
+            # The only part we rewrite; XML always deflates well
+            out_info.compress_type = zipfile.ZIP_DEFLATED
+            zout.writestr(out_info, new_bytes, compresslevel=6)
+            continue
+        out_info.file_size = info.file_size
+        with zin.open(info) as src, zout.open(out_info, 'w') as dst:
+            shutil.copyfileobj(src, dst, _COPY_CHUNK)
+
+
+def _patch_document_xml(docx_path: str, mutate_fn):
     """
-    Remove value by clearing exact text node matches.
-    
-    Args:
-        docx_path: Path to DOCX file
-        value: Value to remove (e.g., "JOHN DOE")
-    
-    Returns:
-        Number of text nodes cleared
+    Rewrite word/document.xml inside a DOCX without extracting the archive.
+
+    mutate_fn(xml_bytes) -> (new_xml_bytes or None, result); None leaves the DOCX untouched.
+    Other members are streamed across with their original order, timestamps,
+    attributes and compression, so stored media is never recompressed. Returns result.
     """
-    if not value or not value.strip():
-        return 0
-    
-    temp_dir = unzip_docx(docx_path)
+    xml_bytes = read_document_xml(docx_path)
+
+    new_bytes, result = mutate_fn(xml_bytes)
+    if new_bytes is None:
+        return result
+
+    tmp_path = docx_path + ".tmp"
     try:
-        document_xml = os.path.join(temp_dir, "word/document.xml")
-        tree = load_xml(document_xml)
-        root = tree.getroot()
-        
-        val_clean = value.strip()
-        removed_count = 0
-        
-        # Find and clear exact matches only
-        for text_node in root.xpath("//w:t", namespaces=WORD_NAMESPACE):
-            if not text_node.text:
-                continue
-            
-            node_text = text_node.text.strip()
-            
-            # Clear if EXACT match (case-insensitive for names)
-            if node_text.lower() == val_clean.lower():
-                # Use NBSP to preserve layout and bullet rendering in Word
-                # Regular spaces can sometimes affect glyph fallback; NBSP is safer
-                text_node.text = "\u00A0"
-                removed_count += 1
-                logger.info(f"    ✂️  Cleared text node: '{node_text}'")
-        
-        # Write back XML
-        tree.write(document_xml, encoding="UTF-8", xml_declaration=True)
-        
-        # Rezip
-        zip_docx(temp_dir, docx_path)
-        
-        return removed_count
+        with zipfile.ZipFile(docx_path, 'r') as zin, zipfile.ZipFile(tmp_path, 'w') as zout:
+            _copy_with_document_xml(zin, zout, new_bytes)
+        os.replace(tmp_path, docx_path)
     finally:
-        import shutil
-        shutil.rmtree(temp_dir)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return result
 
 
-def _remove_value_byte_level(docx_path: str, value: str) -> int:
+# Skip whitespace-only runs inside libxml2; they can never equal a non-empty value
+_NONEMPTY_TEXT_XPATH = etree.XPath("//w:t[normalize-space(.)!='']", namespaces=WORD_NAMESPACE)
+
+
+def _clear_text_nodes(root: etree._Element, values) -> list:
     """
-    Fallback: byte-level replacement in document.xml
-    
-    Regex pattern: <w:t...>VALUE</w:t>
-    Clear by replacing VALUE → "" (preserve tags)
-    
-    Returns:
-        Number of bytes removed
+    Clear <w:t> nodes whose stripped text equals one of values (case-insensitive).
+    Values are tried in order and a node is cleared at most once.
+    Returns the number of nodes cleared per value.
     """
-    if not value or not value.strip():
-        return 0
-    
-    temp_dir = unzip_docx(docx_path)
-    try:
-        document_xml = os.path.join(temp_dir, "word/document.xml")
-        
-        with open(document_xml, "rb") as f:
-            xml_bytes = f.read()
-        
-        val_bytes = value.strip().encode("utf-8")
-        # Replace with NBSP to preserve structure and bullet rendering
-        pattern = b"(<w:t[^>]*>)" + re.escape(val_bytes) + b"(</w:t>)"
-        
-        replaced = re.sub(pattern, b"\\1\xC2\xA0\\2", xml_bytes, flags=re.IGNORECASE)
-        
-        bytes_removed = len(xml_bytes) - len(replaced)
-        
-        if bytes_removed > 0:
-            with open(document_xml, "wb") as f:
-                f.write(replaced)
-            logger.info(f"    ✂️  Byte-level removal: {bytes_removed} bytes")
-        
-        zip_docx(temp_dir, docx_path)
-        return bytes_removed
-    finally:
-        import shutil
-        shutil.rmtree(temp_dir)
+    counts = [0] * len(values)
+    # lowered value -> index of the first value it belongs to
+    targets = {}
+    for k, v in enumerate(values):
+        if v and v.strip():
+            targets.setdefault(v.strip().lower(), k)
+    if not targets:
+        return counts
+
+    # Find and clear exact matches only
+    for text_node in _NONEMPTY_TEXT_XPATH(root):
+        if not text_node.text:
+            continue
+
+        node_text = text_node.text.strip()
+
+        # Clear if EXACT match (case-insensitive for names)
+        k = targets.get(node_text.lower())
+        if k is not None:
+            # Use NBSP to preserve layout and bullet rendering in Word
+            # Regular spaces can sometimes affect glyph fallback; NBSP is safer
+            text_node.text = "\u00A0"
+            counts[k] += 1
+            logger.info(f"    ✂️  Cleared text node: '{node_text}'")
+
+    return counts
 
 
-def _fix_bullet_formatting(docx_path: str) -> int:
+@lru_cache(maxsize=64)
+def _value_pattern(val_bytes: bytes) -> re.Pattern:
+    return re.compile(b"(<w:t[^>]*>)" + re.escape(val_bytes) + b"(</w:t>)", re.IGNORECASE)
+
+
+_NBSP = b"\xC2\xA0"
+_W_T_OPEN = b"<w:t"
+_W_T_CLOSE = b"</w:t>"
+_GT = ord(">")
+
+
+def _digit_value_spans(xml_bytes: bytes, val_bytes: bytes):
     """
-    Fix bullet formatting by changing Symbol/Wingdings fonts to normal fonts.
-    
-    PDF converters often use Symbol font for bullets, which renders as squares in Word.
-    This changes the font to Arial/Calibri so bullets display correctly.
-    
-    Returns: number of runs fixed
+    Yield (start, end) of each <w:t ...>VALUE</w:t> match for an all-digit VALUE,
+    left to right and non-overlapping, exactly as the IGNORECASE regex would find them.
     """
-    temp_dir = unzip_docx(docx_path)
-    try:
-        document_xml = os.path.join(temp_dir, "word/document.xml")
-        tree = load_xml(document_xml)
-        root = tree.getroot()
-        
-        fixed = 0
-        
-        # Find all runs with Symbol/Wingdings fonts
-        for run in root.xpath("//w:r", namespaces=WORD_NAMESPACE):
-            rPr = run.find("w:rPr", WORD_NAMESPACE)
-            if rPr is None:
-                continue
-            
-            # Check font
-            fonts = rPr.find("w:rFonts", WORD_NAMESPACE)
-            if fonts is None:
+    n = len(val_bytes)
+    last = 0  # a match's opening tag cannot start inside the previous match
+    pos = xml_bytes.find(val_bytes)
+    while pos != -1:
+        end = pos + n
+        if (
+            pos > 0
+            and xml_bytes[pos - 1] == _GT
+            and xml_bytes[end:end + 6].lower() == _W_T_CLOSE
+        ):
+            tag_start = max(xml_bytes.rfind(b">", 0, pos - 1) + 1, last)
+            if xml_bytes[tag_start:pos - 1].lower().find(_W_T_OPEN) != -1:
+                yield pos, end
+                last = end + len(_W_T_CLOSE)
+                pos = xml_bytes.find(val_bytes, last)
                 continue
-            
-            # Get the font names
-            ascii_font = fonts.get(f"{{{WORD_NAMESPACE['w']}}}ascii", "")
-            
-            # If it's Symbol or Wingdings, change to Arial
-            if ascii_font in ['Symbol', 'Wingdings', 'Webdings', 'MT Extra']:
-                # Change all font attributes to Arial
-                fonts.set(f"{{{WORD_NAMESPACE['w']}}}ascii", "Arial")
-                fonts.set(f"{{{WORD_NAMESPACE['w']}}}hAnsi", "Arial")
-                fonts.set(f"{{{WORD_NAMESPACE['w']}}}cs", "Arial")
-                fixed += 1
-                
-                text_node = run.find("w:t", WORD_NAMESPACE)
-                if text_node is not None and text_node.text:
-                    logger.info(f"  ✓ Changed {ascii_font} → Arial for text: {repr(text_node.text[:20])}")
-        
-        # Write back XML
-        tree.write(document_xml, encoding="UTF-8", xml_declaration=True)
-        
-        # Rezip
-        zip_docx(temp_dir, docx_path)
-        
-        return fixed
-    finally:
-        import shutil
-        shutil.rmtree(temp_dir)
+        pos = xml_bytes.find(val_bytes, pos + 1)
+
+
+def _replace_value_bytes(xml_bytes: bytes, value: str):
+    """
+    Regex pattern: <w:t...>VALUE</w:t>, VALUE → NBSP (tags preserved).
+    Returns (xml_bytes, bytes_removed); the input is returned unchanged when nothing was removed.
+    """
+    val_bytes = value.strip().encode("utf-8")
+    # Replace with NBSP to preserve structure and bullet rendering
+    if val_bytes.isdigit():
+        # Roll numbers have no case variants: plain find() loop, no regex engine
+        out = bytearray()
+        last = 0
+        for start, end in _digit_value_spans(xml_bytes, val_bytes):
+            out += xml_bytes[last:start]
+            out += _NBSP
+            last = end
+        replaced = bytes(out) + xml_bytes[last:] if last else xml_bytes
+    else:
+        replaced = _value_pattern(val_bytes).sub(b"\\1" + _NBSP + b"\\2", xml_bytes)
+    bytes_removed = len(xml_bytes) - len(replaced)
+
+    if bytes_removed > 0:
+        logger.info(f"    ✂️  Byte-level removal: {bytes_removed} bytes")
+        return replaced, bytes_removed
+    return xml_bytes, bytes_removed
+
+
+_SYMBOL_FONTS = ['Symbol', 'Wingdings', 'Webdings', 'MT Extra']
+# First rFonts of each run's first rPr, filtered to symbol fonts inside libxml2
+_SYMBOL_RFONTS_XPATH = etree.XPath(
+    "//w:r/w:rPr[1]/w:rFonts[1][" + " or ".join(f"@w:ascii='{f}'" for f in _SYMBOL_FONTS) + "]",
+    namespaces=WORD_NAMESPACE,
+)
+
+
+def _fix_bullet_fonts(root: etree._Element) -> int:
+    """Change Symbol/Wingdings run fonts to Arial. Returns number of runs fixed."""
+    fixed = 0
+
+    # Only runs whose font is Symbol/Wingdings come back; change them to Arial
+    for fonts in _SYMBOL_RFONTS_XPATH(root):
+        ascii_font = fonts.get(f"{{{WORD_NAMESPACE['w']}}}ascii", "")
+
+        # Change all font attributes to Arial
+        fonts.set(f"{{{WORD_NAMESPACE['w']}}}ascii", "Arial")
+        fonts.set(f"{{{WORD_NAMESPACE['w']}}}hAnsi", "Arial")
+        fonts.set(f"{{{WORD_NAMESPACE['w']}}}cs", "Arial")
+        fixed += 1
+
+        run = fonts.getparent().getparent()
+        text_node = run.find("w:t", WORD_NAMESPACE)
+        if text_node is not None and text_node.text:
+            logger.info(f"  ✓ Changed {ascii_font} → Arial for text: {repr(text_node.text[:20])}")
+
+    return fixed
+
+
+def _anonymize_pass(xml_bytes: bytes, name: str = None, roll_no: str = None):
+    """
+    Roll removal, name removal and bullet-font fix in one parse/serialize of document.xml.
+    Same order and results as running the three steps one after another.
+    Returns (xml_bytes, stats).
+    """
+    tree = _parse_xml_bytes(xml_bytes)
+    root = tree.getroot()
+
+    # Roll number first (usually numbers, less collision risk), then name
+    removed_roll, removed_name = _clear_text_nodes(root, [roll_no, name])
+
+    # Fix bullet formatting to ensure circular bullets in Word
+    logger.info(f"  📍 Fixing bullet formatting...")
+    bullet_fixed = _fix_bullet_fonts(root)
+    if bullet_fixed > 0:
+        logger.info(f"  ✓ Fixed {bullet_fixed} bullet paragraphs")
+
+    xml_bytes = _serialize(tree)
+
+    # Byte-level regex only as a fallback for values no text node matched
+    if roll_no and removed_roll == 0 and roll_no.strip():
+        logger.info(f"  ⚠️  No text nodes matched roll number, trying byte-level...")
+        xml_bytes, removed_roll = _replace_value_bytes(xml_bytes, roll_no)
+    if name and removed_name == 0 and name.strip():
+        logger.info(f"  ⚠️  No text nodes matched name, trying byte-level...")
+        xml_bytes, removed_name = _replace_value_bytes(xml_bytes, name)
+
+    stats = {
+        "removed_name": removed_name,
+        "removed_roll": removed_roll,
+        "bytes_removed": removed_roll + removed_name,
+    }
+    return xml_bytes, stats
+
+
+def _log_targets(name: str = None, roll_no: str = None):
+    if roll_no:
+        logger.info(f"  🔍 Removing roll number: {roll_no}")
+    if name:
+        logger.info(f"  🔍 Removing name: {name}")
 
 
 def anonymize_docx(input_path: str, output_path: str, name: str = None, roll_no: str = None) -> dict:
@@ -213,44 +281,44 @@ def anonymize_docx(input_path: str, output_path: str, name: str = None, roll_no:
             "bytes_removed": total
         }
     """
-    import shutil
-    
     # Copy input to output first
     shutil.copy(input_path, output_path)
     
     logger.info(f"🔄 Anonymizing {output_path}...")
-    
-    stats = {
-        "removed_name": 0,
-        "removed_roll": 0,
-        "bytes_removed": 0,
-    }
-    
-    # Remove roll number first (usually numbers, less collision risk)
-    if roll_no:
-        logger.info(f"  🔍 Removing roll number: {roll_no}")
-        count = _remove_value_from_text_nodes(output_path, roll_no)
-        if count == 0:
-            logger.info(f"  ⚠️  No text nodes matched, trying byte-level...")
-            count = _remove_value_byte_level(output_path, roll_no)
-        stats["removed_roll"] = count
-        stats["bytes_removed"] += count
-    
-    # Remove name (usually longer text)
-    if name:
-        logger.info(f"  🔍 Removing name: {name}")
-        count = _remove_value_from_text_nodes(output_path, name)
-        if count == 0:
-            logger.info(f"  ⚠️  No text nodes matched, trying byte-level...")
-            count = _remove_value_byte_level(output_path, name)
-        stats["removed_name"] = count
-        stats["bytes_removed"] += count
-    
-    # Fix bullet formatting to ensure circular bullets in Word
-    logger.info(f"  📍 Fixing bullet formatting...")
-    bullet_fixed = _fix_bullet_formatting(output_path)
-    if bullet_fixed > 0:
-        logger.info(f"  ✓ Fixed {bullet_fixed} bullet paragraphs")
+    _log_targets(name, roll_no)
+
+    # One parse/serialize of document.xml for all three edits
+    stats = _patch_document_xml(output_path, lambda xml_bytes: _anonymize_pass(xml_bytes, name, roll_no))
     
     logger.info(f"✅ Anonymization complete: {stats}")
     return stats
+
+
+def anonymize_document(docx: io.BytesIO, name: str = None, roll_no: str = None, document_xml: bytes = None):
+    """
+    In-memory anonymization that also hands back the new word/document.xml.
+
+    docx: the DOCX as a BytesIO (or raw bytes); it is read in place, never copied.
+
+    document_xml: the DOCX's document.xml if the caller already read it (e.g. for
+    detection), so it is not inflated from the zip a second time.
+
+    Returns:
+        (docx_bytes, document_xml, stats) with stats as in anonymize_docx;
+        detect_identity(document_xml) then needs no zip read for the after-check.
+    """
+    if isinstance(docx, (bytes, bytearray)):
+        docx = io.BytesIO(docx)
+    logger.info(f"🔄 Anonymizing in memory ({docx.getbuffer().nbytes} bytes)...")
+    _log_targets(name, roll_no)
+
+    with zipfile.ZipFile(docx, 'r') as zin:
+        if document_xml is None:
+            document_xml = zin.read(DOCUMENT_XML)
+        xml_bytes, stats = _anonymize_pass(document_xml, name, roll_no)
+        out = io.BytesIO()
+        with zipfile.ZipFile(out, 'w') as zout:
+            _copy_with_document_xml(zin, zout, xml_bytes)
+
+    logger.info(f"✅ Anonymization complete: {stats}")
+    return out.getvalue(), xml_bytes, stats
@@ -10,6 +10,7 @@ CRITICAL:
 - Uses regex patterns tuned for academic documents
 """
 
+import io
 import re
 from lxml import etree
 from logger import get_logger
@@ -17,6 +18,25 @@ from logger import get_logger
 logger = get_logger(__name__)
 
 WORD_NAMESPACE = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
+W_T = f"{{{WORD_NAMESPACE['w']}}}t"
+
+# Compiled once at import; detect_identity runs on every request
+_LABEL_RE = re.compile(r"^(NAME|STUDENT\s+NAME|SUBMITTED\s+BY|AUTHOR)\s*:?\s*(.*)$", re.IGNORECASE)
+_ROLL_RE = re.compile(r"^(ROLL\s*NO|ROLL\s*NUMBER|STUDENT\s*ID|ENROLLMENT\s*NO)\s*:?\s*(.*)$", re.IGNORECASE)
+_ROLL_DIGIT_RE = re.compile(r"^\d{6,15}$")
+_NAME_SEARCH_RE = re.compile(r"(?:NAME|STUDENT\s+NAME|SUBMITTED\s+BY)\s*[:–-]?\s*([A-Z][A-Za-z]+\s+[A-Z][A-Za-z]+)", re.IGNORECASE)
+_ROLL_SEARCH_RE = re.compile(r"(?:ROLL|ENROLLMENT|ID)\s*[:–-]?\s*(\d{6,15})", re.IGNORECASE)
+# Fused forms of the Pattern 2 / weak searches, so one scan finds whichever comes first
+_SEARCH_ANY_RE = re.compile(
+    r"(?:NAME|STUDENT\s+NAME|SUBMITTED\s+BY)\s*[:–-]?\s*(?P<name>[A-Z][A-Za-z]+\s+[A-Z][A-Za-z]+)"
+    r"|(?:ROLL|ENROLLMENT|ID)\s*[:–-]?\s*(?P<roll>\d{6,15})",
+    re.IGNORECASE,
+)
+# Digits vs letters: the two alternatives can never overlap, so finditer sees the same first hits
+_WEAK_ANY_RE = re.compile(r"\b(?P<roll>\d{6,15})\b|\b(?P<name>[A-Z][A-Za-z]+\s+[A-Z][A-Za-z]+)\b")
+
+# detect_identity reads at most the first 30 nodes plus 3 look-ahead nodes
+HEAD_NODES = 33
 
 
 def extract_text_nodes(root: etree._Element) -> list:
@@ -24,15 +44,39 @@ def extract_text_nodes(root: etree._Element) -> list:
     return [t.text or "" for t in root.xpath("//w:t", namespaces=WORD_NAMESPACE)]
 
 
-def extract_first_n_lines(root: etree._Element, n: int = 20) -> str:
-    """Extract first N text nodes (document start)."""
-    texts = extract_text_nodes(root)
+def extract_text_nodes_head(source, n: int = HEAD_NODES) -> list:
+    """
+    First n text nodes of a document.xml (path or raw bytes), streamed.
+    Stops parsing after n nodes and frees elements as it goes.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+
+    texts = []
+    if n <= 0:
+        return texts
+    for _, elem in etree.iterparse(source, events=("end",), tag=W_T):
+        texts.append(elem.text or "")
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+        if len(texts) >= n:
+            break
+    return texts
+
+
+def extract_first_n_lines_from(texts: list, n: int = 20) -> str:
+    """Join the first N of already-extracted text nodes (no tree walk)."""
     return " ".join(texts[:n]).strip()
 
 
-def detect_identity(docx_tree: etree._ElementTree) -> dict:
+def detect_identity(docx_tree) -> dict:
     """
     Detect student identity from DOCX.
+
+    docx_tree is a parsed document.xml tree or root element (e.g. one already
+    loaded for anonymization), or a document.xml path / raw bytes; the latter
+    are streamed and only the first HEAD_NODES text nodes are parsed.
     
     Returns:
     {
@@ -41,31 +85,27 @@ def detect_identity(docx_tree: etree._ElementTree) -> dict:
         "confidence": "HIGH" | "MEDIUM" | "LOW" | "CLEAN"
     }
     """
-    root = docx_tree.getroot()
-    texts = extract_text_nodes(root)
-    first_section = extract_first_n_lines(root, 25)
+    if isinstance(docx_tree, etree._ElementTree):
+        docx_tree = docx_tree.getroot()
+    if isinstance(docx_tree, etree._Element):
+        texts = extract_text_nodes(docx_tree)
+    else:
+        texts = extract_text_nodes_head(docx_tree)
+    # One walk: the first section reuses the extracted nodes
+    first_section = extract_first_n_lines_from(texts, 25)
     
     detected_name = None
     detected_roll = None
     confidence = "LOW"
     
     # Pattern 1: Label + value (NAME: JOHN DOE or NAME: value in next node)
-    label_pattern = re.compile(
-        r"^(NAME|STUDENT\s+NAME|SUBMITTED\s+BY|AUTHOR)\s*:?\s*(.*)$",
-        re.IGNORECASE
-    )
-    roll_pattern = re.compile(
-        r"^(ROLL\s*NO|ROLL\s*NUMBER|STUDENT\s*ID|ENROLLMENT\s*NO)\s*:?\s*(.*)$",
-        re.IGNORECASE
-    )
-    
     for idx, txt in enumerate(texts[:30]):  # Only first 30 nodes
         txt_clean = txt.strip()
         if not txt_clean or len(txt_clean) < 2:
             continue
         
         # Check if this is a NAME label
-        m_name = label_pattern.match(txt_clean)
+        m_name = _LABEL_RE.match(txt_clean)
         if m_name and not detected_name:
             value = m_name.group(2).strip()
             if value and len(value) > 2:
@@ -83,50 +123,67 @@ def detect_identity(docx_tree: etree._ElementTree) -> dict:
                         break
         
         # Check if this is a ROLL label
-        m_roll = roll_pattern.match(txt_clean)
+        m_roll = _ROLL_RE.match(txt_clean)
         if m_roll and not detected_roll:
             value = m_roll.group(2).strip()
-            if value and re.match(r"^\d{6,15}$", value):
+            if value and _ROLL_DIGIT_RE.match(value):
                 detected_roll = value
                 logger.info(f"  🔍 Detected roll from label: {detected_roll}")
             else:
                 # Try next node
                 for next_idx in range(idx + 1, min(idx + 4, len(texts))):
                     next_txt = texts[next_idx].strip()
-                    if re.match(r"^\d{6,15}$", next_txt):
+                    if _ROLL_DIGIT_RE.match(next_txt):
                         detected_roll = next_txt
                         logger.info(f"  🔍 Detected roll from next node: {detected_roll}")
                         break
     
     # Pattern 2: Regex on first section if still missing
-    if not detected_name:
-        m = re.search(
-            r"(?:NAME|STUDENT\s+NAME|SUBMITTED\s+BY)\s*[:–-]?\s*([A-Z][A-Za-z]+\s+[A-Z][A-Za-z]+)",
-            first_section,
-            re.IGNORECASE
-        )
+    if not detected_name and not detected_roll:
+        # One scan up to the first hit of either kind; neither pattern can
+        # match earlier, so the other is only searched for from that point on
+        m = _SEARCH_ANY_RE.search(first_section)
+        if m:
+            if m.group("name") is not None:
+                detected_name = m.group("name").strip()
+                confidence = "HIGH"
+                logger.info(f"  🔍 Detected name from regex: {detected_name}")
+                rm = _ROLL_SEARCH_RE.search(first_section, m.start())
+                if rm:
+                    detected_roll = rm.group(1).strip()
+                    logger.info(f"  🔍 Detected roll from regex: {detected_roll}")
+            else:
+                nm = _NAME_SEARCH_RE.search(first_section, m.start())
+                if nm:
+                    detected_name = nm.group(1).strip()
+                    confidence = "HIGH"
+                    logger.info(f"  🔍 Detected name from regex: {detected_name}")
+                detected_roll = m.group("roll").strip()
+                logger.info(f"  🔍 Detected roll from regex: {detected_roll}")
+    elif not detected_name:
+        m = _NAME_SEARCH_RE.search(first_section)
         if m:
             detected_name = m.group(1).strip()
             confidence = "HIGH"
             logger.info(f"  🔍 Detected name from regex: {detected_name}")
-    
-    if not detected_roll:
-        m = re.search(r"(?:ROLL|ENROLLMENT|ID)\s*[:–-]?\s*(\d{6,15})", first_section, re.IGNORECASE)
+    elif not detected_roll:
+        m = _ROLL_SEARCH_RE.search(first_section)
         if m:
             detected_roll = m.group(1).strip()
             logger.info(f"  🔍 Detected roll from regex: {detected_roll}")
     
-    # If nothing found yet, do weak fallback
+    # If nothing found yet, do weak fallback (one pass for both values)
     if not detected_name or not detected_roll:
-        roll_weak = re.search(r"\b(\d{6,15})\b", first_section)
-        name_weak = re.search(r"\b([A-Z][A-Za-z]+\s+[A-Z][A-Za-z]+)\b", first_section)
-        
-        if roll_weak and not detected_roll:
-            detected_roll = roll_weak.group(1)
-            confidence = "LOW"
-        if name_weak and not detected_name:
-            detected_name = name_weak.group(1)
-            confidence = "LOW"
+        for m in _WEAK_ANY_RE.finditer(first_section):
+            if m.group("roll") is not None:
+                if not detected_roll:
+                    detected_roll = m.group("roll")
+                    confidence = "LOW"
+            elif not detected_name:
+                detected_name = m.group("name")
+                confidence = "LOW"
+            if detected_name and detected_roll:
+                break
     
     # Determine final confidence
     if detected_name and detected_roll:
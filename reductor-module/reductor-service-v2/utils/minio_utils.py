@@ -5,12 +5,120 @@ MinIO utilities: download/upload files
 """
 
 import io
+import os
+import hashlib
+import asyncio
+import socket
+import ssl
+import threading
+from typing import BinaryIO, Union
+from concurrent.futures import ThreadPoolExecutor
+import certifi
+import urllib3
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
 from minio import Minio
+from minio.error import S3Error
 from config import config
 from logger import get_logger
 
 logger = get_logger(__name__)
 
+_TIMEOUT = 5 * 60  # minio-py's own default
+_SHA256_META = "sha256"
+
+
+def _tls_context() -> ssl.SSLContext:
+    """
+    Client TLS context for MINIO_USE_SSL: verified against the same CA bundle as
+    minio-py, TLS 1.2 restricted to AEAD suites (AES-GCM first for AES-NI, then
+    ChaCha20), and TLS 1.3 only when MINIO_TLS_MIN_VERSION=TLSv1_3.
+    """
+    ctx = ssl.create_default_context(cafile=os.environ.get("SSL_CERT_FILE") or certifi.where())
+    ctx.minimum_version = ssl.TLSVersion[config.MINIO_TLS_MIN_VERSION]
+    # Affects TLS 1.2 only; OpenSSL's TLS 1.3 suites are already AES-GCM / ChaCha20
+    ctx.set_ciphers("ECDHE+AESGCM:ECDHE+CHACHA20")
+    return ctx
+
+
+def _new_http_client() -> urllib3.PoolManager:
+    """
+    One connection pool for every MinIO call in the process. Same timeouts, retries
+    and CA bundle as minio-py's built-in client, but large enough for parallel
+    multipart/range transfers and with keep-alive so connections are reused.
+    """
+    if config.MINIO_USE_SSL:
+        tls = {"ssl_context": _tls_context()}
+    else:
+        tls = {"cert_reqs": "CERT_REQUIRED", "ca_certs": os.environ.get("SSL_CERT_FILE") or certifi.where()}
+
+    return urllib3.PoolManager(
+        num_pools=16,
+        maxsize=config.MINIO_POOL_MAXSIZE,
+        block=False,
+        timeout=urllib3.Timeout(connect=_TIMEOUT, read=_TIMEOUT),
+        retries=Retry(total=5, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]),
+        socket_options=HTTPConnection.default_socket_options + [
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+        ],
+        **tls,
+    )
+
+
+def _read_response(response):
+    """
+    Read a GET response body straight into a BytesIO sized from Content-Length.
+    The body lands in the BytesIO's own buffer once (no read() bytes + wrap copies).
+    Returns (data, size).
+    """
+    length = response.headers.get("Content-Length")
+    if length is None:
+        body = response.read()
+        return io.BytesIO(body), len(body)
+
+    size = int(length)
+    # Grow the internal buffer to its final size, then fill it in place
+    data = _presized_buffer(size)
+    if size:
+        with data.getbuffer() as view:
+            _readinto_fully(response, view)
+    return data, size
+
+
+def _presized_buffer(size: int) -> io.BytesIO:
+    """BytesIO whose internal buffer is already size bytes long."""
+    data = io.BytesIO()
+    if size:
+        data.seek(size - 1)
+        data.write(b"\0")
+        data.seek(0)
+    return data
+
+
+def _readinto_fully(response, view: memoryview):
+    """Fill view from response, raising if the body ends early."""
+    off = 0
+    size = len(view)
+    while off < size:
+        n = response.readinto(view[off:])
+        if not n:
+            raise IOError(f"Short read: got {off} of {size} bytes")
+        off += n
+
+
+class _ResponseReader(io.BufferedReader):
+    """Buffered reader over a GET response; closing it also returns the connection to the pool."""
+
+    def __init__(self, response, buffer_size: int):
+        super().__init__(response, buffer_size=buffer_size)
+        self._response = response
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._response.release_conn()
+
 
 class MinIOClient:
     def __init__(self):
@@ -23,38 +131,270 @@ class MinIOClient:
             access_key=config.MINIO_ACCESS_KEY,
             secret_key=config.MINIO_SECRET_KEY,
             secure=config.MINIO_USE_SSL,
+            http_client=_new_http_client(),
         )
 
     def download(self, bucket: str, object_key: str) -> io.BytesIO:
         """Download file from MinIO."""
-        logger.info(f"⬇️  Downloading from MinIO: {bucket}/{object_key}")
+        logger.debug("⬇️  Downloading from MinIO: %s/%s", bucket, object_key)
         try:
             response = self.client.get_object(bucket, object_key)
-            data = io.BytesIO(response.read())
-            response.close()
-            logger.info(f"✅ Downloaded {object_key} ({len(data.getvalue())} bytes)")
+            try:
+                data, size = _read_response(response)
+            finally:
+                response.close()
+                response.release_conn()
+            logger.debug("✅ Downloaded %s (%d bytes)", object_key, size)
             return data
         except Exception as e:
-            logger.error(f"❌ Download failed: {e}")
+            logger.error("❌ Download failed: %s", e)
+            raise
+
+    def download_parallel(self, bucket: str, object_key: str, chunk_size: int = 8 << 20, max_concurrency: int = 16) -> io.BytesIO:
+        """
+        Download a large object with concurrent range GETs.
+        Every range is read straight into its slice of one presized buffer.
+        """
+        logger.debug("⬇️  Downloading from MinIO (parallel): %s/%s", bucket, object_key)
+        try:
+            size = self.client.stat_object(bucket, object_key).size
+            if size <= chunk_size:
+                return self.download(bucket, object_key)
+
+            data = _presized_buffer(size)
+            ranges = [(start, min(start + chunk_size, size)) for start in range(0, size, chunk_size)]
+
+            def fetch(view, start, end):
+                response = self.client.get_object(bucket, object_key, offset=start, length=end - start)
+                try:
+                    _readinto_fully(response, view[start:end])
+                finally:
+                    response.close()
+                    response.release_conn()
+
+            with data.getbuffer() as view:
+                with ThreadPoolExecutor(max_workers=min(max_concurrency, len(ranges))) as ex:
+                    for future in [ex.submit(fetch, view, start, end) for start, end in ranges]:
+                        future.result()
+
+            logger.debug("✅ Downloaded %s (%d bytes, %d ranges)", object_key, size, len(ranges))
+            return data
+        except Exception as e:
+            logger.error("❌ Download failed: %s", e)
+            raise
+
+    def download_stream(self, bucket: str, object_key: str, buffer_size: int = 1 << 20) -> io.BufferedReader:
+        """
+        Open an object for sequential reading without buffering all of it.
+        The caller must close the reader (or use it in a with block) to release the connection.
+        """
+        logger.debug("⬇️  Streaming from MinIO: %s/%s", bucket, object_key)
+        try:
+            return _ResponseReader(self.client.get_object(bucket, object_key), buffer_size)
+        except Exception as e:
+            logger.error("❌ Download failed: %s", e)
+            raise
+
+    def download_to(self, bucket: str, object_key: str, path: str) -> int:
+        """
+        Download straight to a file on disk; memory use stays constant however large
+        the object is. Prefer this over download() when the data ends up on disk anyway.
+        Returns the object size in bytes.
+        """
+        logger.debug("⬇️  Downloading from MinIO: %s/%s -> %s", bucket, object_key, path)
+        try:
+            stat = self.client.fget_object(bucket, object_key, path)
+            logger.debug("✅ Downloaded %s (%d bytes)", object_key, stat.size)
+            return stat.size
+        except Exception as e:
+            logger.error("❌ Download failed: %s", e)
+            raise
+
+    def etag(self, bucket: str, object_key: str) -> str:
+        """ETag of an object (a HEAD request; no data is transferred)."""
+        return self.client.stat_object(bucket, object_key).etag
+
+    def exists(self, bucket: str, object_key: str) -> bool:
+        try:
+            self.client.stat_object(bucket, object_key)
+            return True
+        except S3Error as e:
+            if e.code in ("NoSuchKey", "NoSuchObject"):
+                return False
             raise
 
-    def upload(self, bucket: str, object_key: str, file_data: io.BytesIO, content_type: str = "application/octet-stream"):
-        """Upload file to MinIO."""
-        logger.info(f"⬆️  Uploading to MinIO: {bucket}/{object_key}")
+    def _stored_sha256(self, bucket: str, object_key: str):
+        """SHA-256 recorded by a previous skip_unchanged upload, or None."""
+        try:
+            stat = self.client.stat_object(bucket, object_key)
+        except S3Error as e:
+            if e.code in ("NoSuchKey", "NoSuchObject"):
+                return None
+            raise
+        return (stat.metadata or {}).get(f"x-amz-meta-{_SHA256_META}")
+
+    def upload(self, bucket: str, object_key: str, file_data: Union[bytes, bytearray, memoryview, BinaryIO],
+               content_type: str = "application/octet-stream", length: int = None,
+               part_size: int = None, num_parallel_uploads: int = None, skip_unchanged: bool = False):
+        """
+        Upload file to MinIO.
+        file_data is raw bytes / bytearray / memoryview (wrapped in a BytesIO, which
+        shares a bytes buffer but copies the other two) or any readable file object; pass length to stream e.g. an open file without buffering it.
+        Objects of at least MINIO_MULTIPART_THRESHOLD bytes go up as a multipart upload
+        with part_size parts, num_parallel_uploads at a time (defaults from config).
+
+        skip_unchanged (bytes-like data only): store the payload's SHA-256 as object
+        metadata and skip the PUT when the object already carries the same digest,
+        so a retry of identical content costs one HEAD instead of a full upload.
+        """
+        logger.debug("⬆️  Uploading to MinIO: %s/%s", bucket, object_key)
         try:
+            metadata = None
+            if isinstance(file_data, (bytes, bytearray, memoryview)):
+                if skip_unchanged:
+                    digest = hashlib.sha256(file_data).hexdigest()
+                    if self._stored_sha256(bucket, object_key) == digest:
+                        logger.info("♻️  %s/%s unchanged (sha256 %s); skipping upload", bucket, object_key, digest[:12])
+                        return
+                    metadata = {_SHA256_META: digest}
+                file_size = memoryview(file_data).nbytes
+                # Shares a bytes buffer without copying; bytearray / memoryview are copied once
+                file_data = io.BytesIO(file_data)
+            elif length is not None:
+                file_size = length
+            else:
+                # Size from the stream position; getvalue() would copy the whole buffer
+                file_data.seek(0, io.SEEK_END)
+                file_size = file_data.tell()
             file_data.seek(0)
-            file_size = len(file_data.getvalue())
-            self.client.put_object(
-                bucket,
-                object_key,
-                file_data,
-                file_size,
-                content_type=content_type,
-            )
-            logger.info(f"✅ Uploaded {object_key} ({file_size} bytes)")
+            if file_size >= config.MINIO_MULTIPART_THRESHOLD:
+                # Concurrent UploadPart requests instead of one single-stream PUT
+                self.client.put_object(
+                    bucket,
+                    object_key,
+                    file_data,
+                    file_size,
+                    content_type=content_type,
+                    part_size=part_size or config.MINIO_PART_SIZE,
+                    num_parallel_uploads=num_parallel_uploads or config.MINIO_PARALLEL_UPLOADS,
+                    metadata=metadata,
+                )
+            else:
+                self.client.put_object(
+                    bucket,
+                    object_key,
+                    file_data,
+                    file_size,
+                    content_type=content_type,
+                    metadata=metadata,
+                )
+            logger.debug("✅ Uploaded %s (%d bytes)", object_key, file_size)
         except Exception as e:
-            logger.error(f"❌ Upload failed: {e}")
+            logger.error("❌ Upload failed: %s", e)
             raise
 
+    def upload_file(self, bucket: str, object_key: str, path: str, content_type: str = "application/octet-stream"):
+        """
+        Upload a file that is already on disk (preferred over upload() in that case).
+        minio-py opens and sizes the file itself, so no BytesIO or caller-side read is involved.
+        """
+        logger.debug("⬆️  Uploading file to MinIO: %s -> %s/%s", path, bucket, object_key)
+        try:
+            file_size = os.path.getsize(path)
+            if file_size >= config.MINIO_MULTIPART_THRESHOLD:
+                self.client.fput_object(
+                    bucket,
+                    object_key,
+                    path,
+                    content_type=content_type,
+                    part_size=config.MINIO_PART_SIZE,
+                    num_parallel_uploads=config.MINIO_PARALLEL_UPLOADS,
+                )
+            else:
+                self.client.fput_object(bucket, object_key, path, content_type=content_type)
+            logger.debug("✅ Uploaded %s (%d bytes)", object_key, file_size)
+        except Exception as e:
+            logger.error("❌ Upload failed: %s", e)
+            raise
+
+    def bulk_upload(self, items, concurrency: int = 32) -> list:
+        """
+        Upload many (bucket, object_key, data, content_type) items concurrently over
+        the shared connection pool, so small objects don't each wait a full round trip.
+        data takes anything upload() accepts. Returns the object keys in input order;
+        the first failure is re-raised once the other uploads have finished.
+        """
+        items = list(items)
+        if not items:
+            return []
+
+        def one(item):
+            bucket, object_key, data, content_type = item
+            self.upload(bucket, object_key, data, content_type)
+            return object_key
+
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(items))) as ex:
+            return list(ex.map(one, items))
+
+
+# Built on first use, once per process: nothing connects at import time and a
+# forked worker never inherits its parent's pooled sockets
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client() -> MinIOClient:
+    pid = os.getpid()
+    client = _clients.get(pid)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(pid)
+            if client is None:
+                client = _clients[pid] = MinIOClient()
+    return client
+
+
+def _reset_after_fork():
+    global _clients_lock
+    _clients.clear()
+    _clients_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class AsyncMinIOClient:
+    """
+    asyncio front for MinIOClient: each call runs on a worker thread, so one event
+    loop can keep many transfers in flight. The per-process client (and its
+    connection pool) is resolved on every call, so this object is fork-safe too.
+    """
+
+    def __init__(self, max_concurrency: int = 32):
+        self.max_concurrency = max_concurrency
+
+    async def download(self, bucket: str, object_key: str) -> io.BytesIO:
+        return await asyncio.to_thread(get_client().download, bucket, object_key)
+
+    async def upload(self, bucket: str, object_key: str, file_data, content_type: str = "application/octet-stream", length: int = None):
+        await asyncio.to_thread(get_client().upload, bucket, object_key, file_data, content_type, length)
+
+    async def etag(self, bucket: str, object_key: str) -> str:
+        return await asyncio.to_thread(get_client().etag, bucket, object_key)
+
+    async def exists(self, bucket: str, object_key: str) -> bool:
+        return await asyncio.to_thread(get_client().exists, bucket, object_key)
+
+    async def download_many(self, bucket: str, object_keys) -> list:
+        """Download objects concurrently (at most max_concurrency at a time); results in key order."""
+        sem = asyncio.Semaphore(self.max_concurrency)
+
+        async def one(key):
+            async with sem:
+                return await self.download(bucket, key)
+
+        return await asyncio.gather(*(one(key) for key in object_keys))
+
 
-minio_client = MinIOClient()
+async_client = AsyncMinIOClient()
@@ -0,0 +1,44 @@
+"""
+result_cache.py
+
+Cache of finished anonymizations keyed on (bucket, object_key, etag).
+
+A retry of an unchanged PDF (same ETag) can skip download, conversion,
+detection and upload entirely. Entries live only in this process's memory:
+they hold the detected name and roll number, which must never reach disk.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class ResultCache:
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(bucket: str, object_key: str, etag: str) -> tuple:
+        return (bucket, object_key, etag)
+
+    def get(self, bucket: str, object_key: str, etag: str):
+        """Cached result dict for this exact object version, or None."""
+        if not etag:
+            return None
+        key = self._key(bucket, object_key, etag)
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, bucket: str, object_key: str, etag: str, result: dict):
+        if not etag or self.maxsize <= 0:
+            return
+        key = self._key(bucket, object_key, etag)
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)